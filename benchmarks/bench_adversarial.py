@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Compare the conversion of adversarial inputs with and without the linear-time inline parser.
+
+Without it, each conversion is aborted after the time budget (in seconds).
+A single match of a regular expression is not aborted; the runs of
+backquotes are measured at small sizes for that.
+
+Usage::
+
+    $ python benchmarks/bench_adversarial.py [budget]
+"""
+
+import os
+import sys
+from sphinxcontrib.markdown import clock, get_backend, inline, limit_time, TimeBudgetExceeded
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import open_emphasis, open_strong, backticks, backtick_runs  # NOQA
+
+CORPORA = (
+    ('open_emphasis', open_emphasis, (100, 200, 400, 800)),
+    ('open_strong', open_strong, (100, 200, 400, 800)),
+    ('backticks', backticks, (100, 200, 400, 800)),
+    ('backtick_runs', backtick_runs, (25, 50, 75, 100)),
+)
+
+
+def measure(md2node, text, budget):
+    started = clock()
+    try:
+        with limit_time(budget):
+            md2node(text)
+    except TimeBudgetExceeded:
+        return None
+    return clock() - started
+
+
+def main(budget=10.0):
+    defaults = (inline.MAX_DELIMITERS, inline.MAX_UNPAIRED_DELIMITERS)
+    for backend in ('markdown', 'direct'):
+        md2node = get_backend(backend).md2node
+        for name, generator, sizes in CORPORA:
+            for size in sizes:
+                text = generator(size)
+                results = []
+                for limits in (defaults, (len(text), len(text))):  # with and without the linear-time parser
+                    inline.MAX_DELIMITERS, inline.MAX_UNPAIRED_DELIMITERS = limits
+                    try:
+                        elapsed = measure(md2node, text, budget)
+                    finally:
+                        inline.MAX_DELIMITERS, inline.MAX_UNPAIRED_DELIMITERS = defaults
+                    if elapsed is None:
+                        results.append('   >%5.1fs' % budget)
+                    else:
+                        results.append('%8.2fms' % (elapsed * 1000))
+                print('%-8s %-14s %4d: linear %s  patterns %s' % ((backend, name, size) + tuple(results)))
+
+
+if __name__ == '__main__':
+    main(*[float(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Compare batch conversion throughput by the number of worker processes.
+
+Usage::
+
+    $ python benchmarks/bench_batch.py [number]
+"""
+
+import os
+import sys
+import timeit
+from sphinxcontrib.markdown.batch import batch_md2node
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import prose, lists  # NOQA
+
+DOCUMENTS = [prose(20) + lists(20)] * 2
+
+
+def convert(documents, processes):
+    for _ in batch_md2node(documents, processes=processes):
+        pass
+
+
+def main(number=200):
+    documents = DOCUMENTS * (number // len(DOCUMENTS))
+    for processes in (1, 2, 4):
+        elapsed = min(timeit.repeat(lambda: convert(documents, processes), number=1, repeat=3))
+        print('%d processes: %8.1f docs/sec' % (processes, len(documents) / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
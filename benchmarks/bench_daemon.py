@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Measure the latency of previews with and without the conversion daemon.
+
+"spawn" starts Python and converts a document for each preview, like an
+editor without the daemon.  "daemon" sends the edited text to the daemon
+over a Unix domain socket, and "cached" requests the unchanged file again.
+
+Usage::
+
+    $ python benchmarks/bench_daemon.py [size] [number]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import subprocess
+from sphinxcontrib.markdown import clock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import prose  # NOQA
+
+SPAWN_SCRIPT = ('import sys\n'
+                'from sphinxcontrib.markdown.daemon import Converter\n'
+                'Converter().convert(path=sys.argv[1], format=sys.argv[2])\n')
+
+
+def spawn(path, format):
+    subprocess.check_call([sys.executable, '-c', SPAWN_SCRIPT, path, format])
+
+
+def start_daemon(socket_path):
+    process = subprocess.Popen([sys.executable, '-m', 'sphinxcontrib.markdown.daemon', '--socket', socket_path])
+    while not os.path.exists(socket_path):  # the socket is bound after warming up
+        time.sleep(0.01)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    return process, client, client.makefile('rwb')
+
+
+def call(stream, method, params=None):
+    stream.write(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).encode('utf-8') + b'\n')
+    stream.flush()
+    return json.loads(stream.readline().decode('utf-8'))
+
+
+def measure(func, number):
+    """Return the median of the elapsed time of *func* in msec."""
+    timings = []
+    for i in range(number):
+        started = clock()
+        func(i)
+        timings.append(clock() - started)
+
+    return sorted(timings)[number // 2] * 1000
+
+
+def main(size=50, number=10):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, 'index.md')
+        text = prose(size)
+        with io.open(path, 'w', encoding='utf-8') as fd:
+            fd.write(text)
+
+        process, client, stream = start_daemon(os.path.join(tmpdir, 'markdown.sock'))
+        try:
+            for format in ('pseudoxml', 'html'):
+                results = [
+                    measure(lambda i: spawn(path, format), number),
+                    # the text being edited is changed on each preview
+                    measure(lambda i: call(stream, 'convert', {'text': text + str(i), 'path': path,
+                                                               'format': format}), number),
+                    measure(lambda i: call(stream, 'convert', {'path': path, 'format': format}), number),
+                ]
+                print('%-10s: spawn %8.2fms  daemon %8.2fms  cached %8.2fms' % ((format,) + tuple(results)))
+        finally:
+            call(stream, 'shutdown')
+            stream.close()
+            client.close()
+            process.wait()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Compare md2node with the direct conversion (no ElementTree) per corpus.
+
+Usage::
+
+    $ python benchmarks/bench_direct.py [size]
+"""
+
+import os
+import sys
+import timeit
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown import direct
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import CORPORA  # NOQA
+
+
+def main(size=100):
+    for name, generator in CORPORA:
+        text = generator(size)
+        results = []
+        for func in (md2node, direct.md2node):
+            elapsed = min(timeit.repeat(lambda: func(text), number=3, repeat=3)) / 3
+            results.append(elapsed)
+        print('%-8s: md2node %8.2fms  direct %8.2fms  (x%.2f)' %
+              (name, results[0] * 1000, results[1] * 1000, results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Measure the size of pickled doctrees for the examples and the corpora.
+
+Usage::
+
+    $ python benchmarks/bench_doctree_size.py --save   # store the results as baseline
+    $ python benchmarks/bench_doctree_size.py          # compare with the baseline
+
+Run it with ``--save`` on the revision to compare with, then run it again
+on the current tree to see the differences.
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import sys
+import json
+import glob
+import pickle
+import argparse
+from docutils import nodes
+from sphinxcontrib.markdown import md2node
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import CORPORA  # NOQA
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, 'doctree_size.json')
+EXAMPLES = os.path.join(HERE, os.pardir, 'tests', 'examples', '*', '*.md')
+METRICS = ('bytes', 'elements', 'texts')
+
+
+def iter_documents(size):
+    for filename in sorted(glob.glob(EXAMPLES)):
+        with io.open(filename, encoding='utf-8') as fd:
+            name = os.path.basename(os.path.dirname(filename))
+            yield 'example-%s' % name, fd.read()
+
+    for name, generator in CORPORA:
+        yield '%s-%d' % (name, size), generator(size)
+
+
+def measure(text):
+    doctree = md2node(text)
+    findall = getattr(doctree, 'findall', None) or doctree.traverse  # docutils-0.17 or older
+    results = {'bytes': len(pickle.dumps(doctree, pickle.HIGHEST_PROTOCOL)),
+               'elements': 0,
+               'texts': 0}
+    for node in findall():
+        if isinstance(node, nodes.Text):
+            results['texts'] += 1
+        else:
+            results['elements'] += 1
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the size of pickled doctrees')
+    parser.add_argument('--baseline', default=BASELINE, help='path to the baseline (JSON)')
+    parser.add_argument('--save', action='store_true', help='save the results as baseline')
+    parser.add_argument('--size', type=int, default=50, help='size of corpora')
+    options = parser.parse_args(argv)
+
+    baseline = {}
+    if not options.save and os.path.exists(options.baseline):
+        with open(options.baseline) as fd:
+            baseline = json.load(fd)
+
+    results = {}
+    for case, text in iter_documents(options.size):
+        results[case] = measure(text)
+        columns = []
+        for metric in METRICS:
+            value = results[case][metric]
+            expected = baseline.get(case, {}).get(metric)
+            if expected:
+                columns.append('%s=%d (%+.1f%%)' % (metric, value, (float(value) / expected - 1) * 100))
+            else:
+                columns.append('%s=%d' % (metric, value))
+        print('%-16s %s' % (case, ' '.join(columns)))
+
+    if options.save:
+        with open(options.baseline, 'w') as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+        print('baseline saved: %s' % options.baseline)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Compare md2node throughput with and without the engine pool.
+
+Usage::
+
+    $ python benchmarks/bench_engine_pool.py [number]
+"""
+
+import sys
+import timeit
+from textwrap import dedent
+from sphinxcontrib.markdown import create_markdown, md2node
+
+DOCUMENT = dedent(u"""
+    # Headings
+
+    Hello *emphasis*, **strong** and `literal` world.
+
+    * item1 with [link](http://example.com/)
+    * item2
+    * item3
+
+    ## Sub headings
+
+        print "hello world"
+
+    > quoted text
+""")
+
+
+def convert_without_pool():
+    return create_markdown().convert(DOCUMENT)
+
+
+def convert_with_pool():
+    return md2node(DOCUMENT)
+
+
+def main(number=1000):
+    for name, func in (('without pool', convert_without_pool),
+                       ('with pool', convert_with_pool)):
+        elapsed = min(timeit.repeat(func, number=number, repeat=3))
+        print('%-12s: %8.1f docs/sec' % (name, number / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
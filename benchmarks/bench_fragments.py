@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Measure conversion of documents sharing fragments with the fragment cache.
+
+Usage::
+
+    $ python benchmarks/bench_fragments.py [number]
+"""
+
+import os
+import sys
+import timeit
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown.cache import FragmentCache
+from sphinxcontrib.markdown.incremental import IncrementalConverter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import prose, lists  # NOQA
+
+SHARED = prose(3) + lists(2)  # ex. license blurbs and notes included to every page
+
+
+def make_documents(number):
+    return [u'# Document %d\n\nHello world %d\n\n%s' % (i, i, SHARED) for i in range(number)]
+
+
+def main(number=200):
+    documents = make_documents(number)
+
+    def convert():
+        for document in documents:
+            md2node(document)
+
+    def convert_with_fragments():
+        fragments = FragmentCache(1000)
+        for document in documents:
+            IncrementalConverter(fragments=fragments, reuse_blocks=False).convert(document)
+
+    for name, func in (('md2node', convert), ('fragments', convert_with_fragments)):
+        elapsed = min(timeit.repeat(func, number=1, repeat=3))
+        print('%-12s: %8.1f docs/sec' % (name, len(documents) / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Measure the serialization of list-heavy documents.
+
+Usage::
+
+    $ python benchmarks/bench_lists.py [size]
+"""
+
+import os
+import sys
+from sphinxcontrib.markdown import convert_with_timings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import lists, rich_lists  # NOQA
+
+
+def main(size=500):
+    for name, generator in (('list', lists), ('rich_list', rich_lists)):
+        text = generator(size)
+        elapsed = None
+        for _ in range(5):
+            timings = {}
+            convert_with_timings(text, timings)
+            elapsed = min(elapsed or timings['serialize'], timings['serialize'])
+        print('%-12s: serialize %8.2fms  (%6.2f usec/item)' %
+              (name, elapsed * 1000, elapsed * 1000000 / text.count('\n*')))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
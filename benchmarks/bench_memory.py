@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Compare peak memory of md2node and iter_md2node (streaming).
+
+Usage::
+
+    $ python benchmarks/bench_memory.py [sections]
+"""
+
+import sys
+import tracemalloc
+from docutils import nodes
+from sphinxcontrib.markdown import md2node, iter_md2node
+
+SECTION = u"""
+# Headings %(i)d
+
+Hello *emphasis*, **strong** and `literal` world.
+Here is [a link](http://example.com/%(i)d) and <span>inline HTML</span>.
+
+* item1
+* item2
+    * item2-1
+
+## Sub headings %(i)d
+
+    print "hello world"
+
+> quoted text
+"""
+
+
+def build_document(func, text):
+    document = nodes.container()
+    for node in func(text):
+        document += node
+
+    return document
+
+
+def measure(func, text):
+    # create the engine and import the lazily imported modules before tracing
+    build_document(func, SECTION % {'i': 0})
+
+    tracemalloc.start()
+    try:
+        build_document(func, text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(sections=500):
+    text = ''.join(SECTION % {'i': i} for i in range(sections))
+    print('source: %.1f KB' % (len(text.encode('utf-8')) / 1024.0))
+    for name, func in (('md2node', md2node), ('iter_md2node', iter_md2node)):
+        peak = measure(func, text)
+        print('%-12s: peak %8.1f KB' % (name, peak / 1024.0))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
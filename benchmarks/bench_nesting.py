@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Measure the serialization of nested lists.
+
+The outlines are converted from Markdown.  The deep lists are built as
+ElementTree directly, because the block parser of Python-Markdown recurses
+on each level of nesting.
+
+Usage::
+
+    $ python benchmarks/bench_nesting.py [size]
+"""
+
+import os
+import sys
+from markdown.util import etree
+from sphinxcontrib.markdown import clock, convert_with_timings, create_markdown
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import nested_lists  # NOQA
+
+DEPTHS = (100, 5000, 50000)
+
+
+def deep_list(depth):
+    """Make a ``<ul>`` nested *depth* levels deep."""
+    root = parent = etree.Element('div')
+    for i in range(depth):
+        item = etree.SubElement(etree.SubElement(parent, 'ul'), 'li')
+        item.text = 'item %d' % i
+        etree.SubElement(item, 'em').text = 'emphasis'
+        parent = item
+
+    return root
+
+
+def main(size=500):
+    text = nested_lists(size)
+    elapsed = None
+    for _ in range(5):
+        timings = {}
+        convert_with_timings(text, timings)
+        elapsed = min(elapsed or timings['serialize'], timings['serialize'])
+    print('%-16s: serialize %8.2fms  (%6.2f usec/item)' %
+          ('outline', elapsed * 1000, elapsed * 1000000 / text.count('* ')))
+
+    serializer = create_markdown().serializer
+    for depth in DEPTHS:
+        root = deep_list(depth)
+        started = clock()
+        try:
+            serializer(root)
+        except RuntimeError:  # RecursionError
+            print('%-16s: RecursionError' % ('depth %d' % depth))
+            continue
+        elapsed = clock() - started
+        print('%-16s: serialize %8.2fms  (%6.2f usec/item)' %
+              ('depth %d' % depth, elapsed * 1000, elapsed * 1000000 / depth))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
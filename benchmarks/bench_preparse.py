@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Compare the read time of a mixed reST/Markdown project with and without pre-parsing.
+
+Usage::
+
+    $ python benchmarks/bench_preparse.py [documents] [jobs]
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+from sphinx.application import Sphinx
+from sphinxcontrib.markdown import clock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import prose, lists, code  # NOQA
+
+CONF = u"extensions = ['sphinxcontrib.markdown']\nmaster_doc = 'index'\n"
+RST = u"""Hello *world* with ``literal`` and `a link <http://example.com/>`_.
+
+* item
+* item with **strong**
+
+"""
+
+
+def write(path, text):
+    with io.open(path, 'w', encoding='utf-8') as fd:
+        fd.write(text)
+
+
+def make_project(srcdir, documents):
+    docnames = []
+    for i in range(documents):
+        write(os.path.join(srcdir, 'md%03d.md' % i),
+              u'# Markdown %d\n\n%s%s%s' % (i, prose(30), lists(30), code(10)))
+        write(os.path.join(srcdir, 'rst%03d.rst' % i),
+              u'reST %d\n=======\n\n%s' % (i, RST * 150))
+        docnames.extend(['md%03d' % i, 'rst%03d' % i])
+
+    toctree = u''.join(u'   %s\n' % docname for docname in docnames)
+    write(os.path.join(srcdir, 'index.rst'), u'Index\n=====\n\n.. toctree::\n\n' + toctree)
+    write(os.path.join(srcdir, 'conf.py'), CONF)
+
+
+def measure(srcdir, jobs):
+    outdir = tempfile.mkdtemp()
+    try:
+        timings = {}
+
+        def on_env_before_read_docs(app, env, docnames):
+            timings['start'] = clock()
+
+        def on_env_updated(app, env):
+            timings['end'] = clock()
+
+        app = Sphinx(srcdir, srcdir, outdir, os.path.join(outdir, '.doctrees'), 'dummy',
+                     confoverrides={'markdown_preparse_jobs': jobs}, status=None, warning=io.StringIO(),
+                     freshenv=True)
+        # registered before the handlers of the extension
+        app.connect('env-before-read-docs', on_env_before_read_docs, priority=100)
+        app.connect('env-updated', on_env_updated)
+        app.build()
+        return timings['end'] - timings['start']
+    finally:
+        shutil.rmtree(outdir)
+
+
+def main(documents=20, jobs=2):
+    srcdir = tempfile.mkdtemp()
+    try:
+        make_project(srcdir, documents)
+        for preparse_jobs in (0, jobs):
+            elapsed = min(measure(srcdir, preparse_jobs) for _ in range(3))
+            print('markdown_preparse_jobs=%d: read %d documents in %.2f sec' %
+                  (preparse_jobs, documents * 2 + 1, elapsed))
+    finally:
+        shutil.rmtree(srcdir)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
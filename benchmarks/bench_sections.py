@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Measure how SectionPostprocessor scales with the number of headings.
+
+Usage::
+
+    $ python benchmarks/bench_sections.py
+"""
+
+import timeit
+from docutils import nodes
+from sphinxcontrib.markdown import SectionPostprocessor
+
+SIZES = (100, 1000, 10000)
+
+
+def flat_document(headings):
+    document = nodes.container()
+    for i in range(headings):
+        section = nodes.section(level=(i % 3) + 1)
+        section += nodes.title(text='Headings %d' % i)
+        document += section
+        document += nodes.paragraph(text='Hello world')
+
+    return document
+
+
+def main():
+    processor = SectionPostprocessor()
+    previous = None
+    for size in SIZES:
+        documents = [flat_document(size) for _ in range(3)]
+        elapsed = min(timeit.timeit(lambda: processor.run(doc), number=1) for doc in documents)
+        if previous:
+            growth = ' (x%.1f)' % (elapsed / previous)
+        else:
+            growth = ''
+        print('%6d headings: %8.2f msec%s' % (size, elapsed * 1000, growth))
+        previous = elapsed
+
+
+if __name__ == '__main__':
+    main()
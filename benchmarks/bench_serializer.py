@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Measure the cost of Serializer.visit per element type.
+
+Usage::
+
+    $ python benchmarks/bench_serializer.py [number]
+"""
+
+import sys
+import timeit
+from markdown.util import etree
+from sphinxcontrib.markdown import create_markdown
+
+
+def element(tag, text=None, **attributes):
+    elem = etree.Element(tag, attributes)
+    elem.text = text
+    return elem
+
+
+def mailto(email):
+    """Make a link to *email* obfuscated like Python-Markdown's automatic links."""
+    text = ''.join('\x02amp\x03#%d;' % ord(letter) for letter in email)
+    href = ''.join('\x02amp\x03#%d;' % ord(letter) for letter in 'mailto:' + email)
+    return element('a', text, href=href)
+
+
+def code_block():
+    pre = etree.Element('pre')
+    pre.append(element('code', 'print "hello world"\n'))
+    return pre
+
+
+ELEMENTS = [
+    ('p', element('p', 'Hello world')),
+    ('em', element('em', 'emphasis')),
+    ('strong', element('strong', 'strong')),
+    ('code', element('code', 'literal')),
+    ('a', element('a', 'link', href='http://example.com/', title='title')),
+    ('img', element('img', alt='alt', src='/path/to/image.png')),
+    ('mailto', mailto('contributor@example.com')),
+    ('h2', element('h2', 'Headings')),
+    ('li', element('li', 'item')),
+    ('pre', code_block()),
+]
+
+
+def main(number=100000):
+    serializer = create_markdown().serializer
+    for tag, elem in ELEMENTS:
+        elapsed = min(timeit.repeat(lambda: serializer.visit(elem), number=number, repeat=3))
+        print('%-8s: %6.2f usec/element' % (tag, elapsed * 1000000 / number))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Markdown corpora for benchmarks.
+
+Each generator takes a size (the number of repeated units) and returns a
+Markdown document.
+"""
+
+PROSE = u"""Lorem ipsum dolor sit amet, *consectetur* adipiscing elit, sed do
+eiusmod tempor incididunt ut labore et **dolore** magna aliqua.  Ut enim ad
+minim veniam, quis `nostrud` exercitation ullamco laboris nisi ut aliquip ex
+ea commodo consequat [link %(i)d](http://example.com/%(i)d).
+
+"""
+
+LIST = u"""* item %(i)d with *emphasis* and `literal`
+* item with [link](http://example.com/%(i)d "title")
+    * nested item with **strong** text
+    * nested item with ![image](/path/to/image.png)
+1. enumerated item
+2. enumerated item with *emphasis*
+
+"""
+
+RICH_LIST = u"""* item %(i)d with *emphasis*, **strong**, `literal`, [link](http://example.com/%(i)d) and
+  ![image](/path/to/image.png): *a* *b* `c` `d` [e](http://example.com/e) **f** *g* `h`
+    * nested item with `literal` and *emphasis* and **strong** text
+* item %(i)d with <span>inline HTML</span> and *emphasis* and `literal`
+
+"""
+
+HEADING = u"""%(marks)s Headings %(i)d
+
+Hello world
+
+"""
+
+CODE = u"""Example %(i)d:
+
+    def hello(name):
+        print("hello %%s" %% name)
+        return {'name': name, 'value': 1 < 2}
+
+Inline `code %(i)d` and `more <code>`.
+
+"""
+
+FENCED_CODE = u"""Example %(i)d:
+
+```python
+def hello(name):
+    print("hello %%s" %% name)
+
+    return {'name': name, 'value': 1 < 2 and r'\\*'}
+```
+
+"""
+
+HTML = u"""<div class="note">
+<p>Raw HTML block %(i)d</p>
+</div>
+
+Inline <span>HTML</span> with &amp; entities &copy; and &#9999;.
+
+"""
+
+NESTED_LIST = u"""* outline %(i)d
+    * chapter with *emphasis*
+        * section with `literal`
+            * subsection with **strong** text
+                * paragraph with [link](http://example.com/%(i)d)
+                    * deeply nested item
+
+"""
+
+MAILTO = u"""* <user%(i)d@example.com>
+* <contributor-%(i)d@example.org>
+
+"""
+
+
+# Adversarial inputs: the inline patterns of Python-Markdown take quadratic
+# time or worse for them.
+
+def open_emphasis(size):
+    return u'Open emphasis ' + u'*a ' * (size * 10) + u'\n\n'
+
+
+def open_strong(size):
+    return u'Open strong ' + u'**a ' * (size * 10) + u'\n\n'
+
+
+def backticks(size):
+    return u'Backquotes ' + u'`a ' * (size * 10) + u'\n\n'
+
+
+def backtick_runs(size):
+    return u'Runs of backquotes ' + u''.join(u'`' * (i + 1) + u'a' for i in range(size)) + u'\n\n'
+
+
+def prose(size):
+    return u''.join(PROSE % {'i': i} for i in range(size))
+
+
+def lists(size):
+    return u''.join(LIST % {'i': i} for i in range(size))
+
+
+def rich_lists(size):
+    return u''.join(RICH_LIST % {'i': i} for i in range(size))
+
+
+def nested_lists(size):
+    return u''.join(NESTED_LIST % {'i': i} for i in range(size))
+
+
+def headings(size):
+    return u''.join(HEADING % {'i': i, 'marks': '#' * (i % 3 + 1)} for i in range(size))
+
+
+def code(size):
+    return u''.join(CODE % {'i': i} for i in range(size))
+
+
+def fenced_code(size):
+    return u''.join(FENCED_CODE % {'i': i} for i in range(size))
+
+
+def html(size):
+    return u''.join(HTML % {'i': i} for i in range(size))
+
+
+def mailto(size):
+    return u''.join(MAILTO % {'i': i} for i in range(size))
+
+
+CORPORA = [
+    ('prose', prose),
+    ('list', lists),
+    ('rich_list', rich_lists),
+    ('nested_list', nested_lists),
+    ('heading', headings),
+    ('code', code),
+    ('fenced_code', fenced_code),
+    ('html', html),
+    ('mailto', mailto),
+    ('open_emphasis', open_emphasis),
+    ('open_strong', open_strong),
+    ('backticks', backticks),
+    ('backtick_runs', backtick_runs),
+]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite for the Markdown-to-doctree pipeline.
+
+Measures each stage of the conversion (Markdown parsing, serialization,
+section nesting and target registration) and the peak memory for every
+synthetic corpus at several sizes.
+
+Usage::
+
+    $ python benchmarks/suite.py --save        # store the results as baseline
+    $ python benchmarks/suite.py               # compare with the baseline
+
+The exit status is 1 if any result regresses over the threshold.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import argparse
+from docutils.utils import new_document
+from sphinxcontrib.markdown import clock, convert_with_timings, MarkdownParser
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+try:
+    from docutils.frontend import get_default_settings
+except ImportError:  # docutils-0.17 or older
+    from docutils.frontend import OptionParser
+
+    def get_default_settings(*components):
+        return OptionParser(components=components).get_default_values()
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import CORPORA  # NOQA
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SIZES = (10, 100, 1000)
+STAGES = ('markdown', 'serialize', 'sections', 'targets')
+NOISE = 0.001  # differences of timings under 1ms are ignored
+SETTINGS = get_default_settings(MarkdownParser)
+
+
+def convert(text, timings=None):
+    """Run the pipeline like MarkdownParser.parse, recording time of stages."""
+    if timings is None:
+        timings = {}
+
+    document = new_document('<benchmark>', SETTINGS)
+    sections = []
+    document.extend(convert_with_timings(text, timings, sections))
+
+    started = clock()
+    for node in sections:
+        document.note_implicit_target(node)
+    timings['targets'] = clock() - started
+
+    return document
+
+
+def measure(text, repeat):
+    results = {}
+    for _ in range(repeat):
+        timings = {}
+        convert(text, timings)
+        for stage in STAGES:
+            results[stage] = min(results.get(stage, timings[stage]), timings[stage])
+
+    if tracemalloc:
+        tracemalloc.start()
+        try:
+            convert(text)
+            results['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return results
+
+
+def run(sizes, repeat):
+    results = {}
+    for name, generator in CORPORA:
+        for size in sizes:
+            case = '%s-%d' % (name, size)
+            results[case] = measure(generator(size), repeat)
+            timings = ' '.join('%s=%.2fms' % (stage, results[case][stage] * 1000) for stage in STAGES)
+            memory = results[case].get('peak_memory', 0) / 1024.0
+            print('%-24s %s peak=%.0fKB' % (case, timings, memory))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the list of regressions over *threshold* (ratio)."""
+    regressions = []
+    for case in sorted(results):
+        for metric, value in sorted(results[case].items()):
+            expected = baseline.get(case, {}).get(metric)
+            if metric in STAGES:
+                allowance = expected * threshold + NOISE if expected else None
+            else:
+                allowance = expected * threshold if expected else None
+            if allowance is not None and value > expected + allowance:
+                regressions.append('%s %s: %.4g -> %.4g (+%.0f%%)' %
+                                   (case, metric, expected, value, (value / expected - 1) * 100))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Markdown-to-doctree pipeline')
+    parser.add_argument('--baseline', default=BASELINE, help='path to the baseline (JSON)')
+    parser.add_argument('--save', action='store_true', help='save the results as baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed ratio of regression (default: 0.25)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs per case')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='sizes of corpora')
+    options = parser.parse_args(argv)
+
+    results = run(options.sizes, options.repeat)
+    if options.save:
+        with open(options.baseline, 'w') as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+        print('baseline saved: %s' % options.baseline)
+    elif os.path.exists(options.baseline):
+        with open(options.baseline) as fd:
+            regressions = compare(results, json.load(fd), options.threshold)
+        for regression in regressions:
+            print('REGRESSION: %s' % regression)
+        if regressions:
+            return 1
+    else:
+        print('baseline not found: %s (use --save to create it)' % options.baseline)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
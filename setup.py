@@ -37,4 +37,10 @@ setup(
     include_package_data=True,
     install_requires=requires,
     namespace_packages=['sphinxcontrib'],
+    entry_points={
+        'console_scripts': [
+            'md2doctree = sphinxcontrib.markdown.batch:main',
+            'md2doctree-daemon = sphinxcontrib.markdown.daemon:main',
+        ],
+    },
 )
@@ -0,0 +1,1000 @@
+#!/usr/bin/env python
+
+from __future__ import absolute_import
+
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from importlib import import_module
+from contextlib import contextmanager
+from docutils import nodes
+from docutils import parsers
+from sphinxcontrib.markdown import outdated, profiling
+from sphinxcontrib.markdown.cache import FragmentCache, ParseCache
+
+# Python-Markdown and the table of HTML entities are imported on first use,
+# so loading the extension (ex. ``sphinx-build -M clean``) stays cheap.
+
+try:
+    unichr = unichr  # NOQA
+except NameError:  # Python 3
+    unichr = chr
+
+try:
+    from time import perf_counter as clock
+except ImportError:  # Python 2
+    from time import time as clock
+
+try:
+    RecursionError = RecursionError  # NOQA
+except NameError:  # Python 2
+    RecursionError = RuntimeError
+
+__version__ = '0.1.0'
+
+AMP_SUBSTITUTE = '\x02amp\x03'  # markdown.util.AMP_SUBSTITUTE
+MAILTO = ('\x02amp\x03#109;\x02amp\x03#97;\x02amp\x03#105;\x02amp\x03#108;'
+          '\x02amp\x03#116;\x02amp\x03#111;\x02amp\x03#58;\x02')
+INLINE_NODES = (
+    nodes.emphasis,
+    nodes.strong,
+    nodes.literal,
+    nodes.reference,
+    nodes.image,
+    nodes.Text,
+)
+HAVING_BLOCK_NODE = (
+    nodes.list_item,
+)
+BACKENDS = {
+    'markdown': 'sphinxcontrib.markdown',
+    'direct': 'sphinxcontrib.markdown.direct',
+}
+HTML_ENTITY_RE = re.compile(r'&[\#a-zA-Z0-9]*;')
+OBFUSCATED_ENTITY_RE = re.compile(AMP_SUBSTITUTE + r'(?:#([0-9]+)|([a-zA-Z][a-zA-Z0-9]*));')
+EMAIL_CACHE_SIZE = 4096
+MAX_INCREMENTAL_CONVERTERS = 256  # documents whose blocks are kept by markdown_incremental
+FENCED_CODE_RE = re.compile(r'^(?P<fence>`{3,}|~{3,})[ ]*\{?\.?(?P<language>[\w#+.-]*)[^`\n]*\n'
+                            r'(?P<code>.*?)(?<=\n)(?P=fence)[ ]*$', re.MULTILINE | re.DOTALL)
+FENCED_CODE_PLACEHOLDER = u'\x1ffenced-code:%d\x1f'
+FENCED_CODE_PLACEHOLDER_RE = re.compile(u'\x1ffenced-code:([0-9]+)\x1f$')
+FENCED_CODE_IN_HTML_RE = re.compile(u'\n*\x1ffenced-code:([0-9]+)\x1f\n*')
+
+
+def nest_sections(iterable):
+    """Nest flat sections by their levels in a single pass.
+
+    A section takes over the following siblings until a section having the
+    same level appears.  Top-level nodes are yielded as soon as they are
+    finished.  The ``level`` attributes are used only for nesting, so they
+    are removed from the sections.
+    """
+    parents = [None]
+    levels = [None]
+    for subnode in iterable:
+        if isinstance(subnode, nodes.section):
+            level = subnode.attributes.pop('level')
+            if level in levels:
+                index = levels.index(level)
+                if index == 1:
+                    yield parents[1]
+                del parents[index:]
+                del levels[index:]
+
+            if len(parents) > 1:
+                parents[-1] += subnode
+            parents.append(subnode)
+            levels.append(level)
+        elif len(parents) > 1:
+            parents[-1] += subnode
+        else:
+            yield subnode
+
+    if len(parents) > 1:
+        yield parents[1]
+
+
+class SectionPostprocessor(object):
+    def run(self, node):
+        children = node.children[:]
+        del node[:]
+        node.extend(nest_sections(children))
+        return node
+
+
+class FencedCodePreprocessor(object):
+    """Replace fenced code blocks with placeholders before the source is normalized."""
+
+    def __init__(self, markdown):
+        self.markdown = markdown
+
+    def run(self, lines):
+        text, self.markdown.fenced_code_blocks = extract_fenced_code('\n'.join(lines))
+        if self.markdown.fenced_code_blocks:
+            return text.split('\n')
+        else:
+            return lines
+
+
+class FencedCodeProcessor(object):
+    """Make ``fenced_code`` elements from the placeholders of fenced code blocks."""
+
+    def __init__(self, markdown):
+        from markdown.util import etree
+
+        self.markdown = markdown
+        self.etree = etree
+
+    def test(self, parent, block):
+        return FENCED_CODE_PLACEHOLDER_RE.match(block) is not None
+
+    def run(self, parent, blocks):
+        index = FENCED_CODE_PLACEHOLDER_RE.match(blocks.pop(0)).group(1)
+        self.etree.SubElement(parent, 'fenced_code', index=index)
+
+
+class StripPostprocessor(object):
+    def run(self, node):
+        class FakeStripper(object):
+            def strip(self):
+                return node
+
+        return FakeStripper()
+
+
+def decode_entity(matched):
+    codepoint, name = matched.groups()
+    if codepoint:
+        return unichr(int(codepoint))
+
+    try:
+        from html import entities
+    except ImportError:
+        import htmlentitydefs as entities
+
+    codepoint = entities.name2codepoint.get(name)
+    if codepoint is None:
+        return '&%s;' % name  # unknown entity
+    else:
+        return unichr(codepoint)
+
+
+unescaped_emails = {}
+
+
+def unescape_email(text):
+    """Decode the entities obfuscating an e-mail address in a single pass.
+
+    The results are memoized, because the same addresses tend to appear
+    repeatedly (ex. lists of contributors).
+    """
+    email = unescaped_emails.get(text)
+    if email is None:
+        email = OBFUSCATED_ENTITY_RE.sub(decode_entity, text)
+        if len(unescaped_emails) >= EMAIL_CACHE_SIZE:
+            unescaped_emails.clear()
+        unescaped_emails[text] = email
+
+    return email
+
+
+def extract_fenced_code(text):
+    """Replace fenced code blocks in *text* with placeholders.
+
+    Returns the replaced text and a list of tuples of the code, its language
+    (or None) and the source of the block.  The code is kept verbatim; it is
+    not normalized, escaped or stashed by Python-Markdown.  Each placeholder
+    is put on its own block.
+    """
+    blocks = []
+    if '```' not in text and '~~~' not in text:
+        return text, blocks
+
+    def replace(matched):
+        blocks.append((matched.group('code'), matched.group('language') or None, matched.group(0)))
+        return u'\n\n%s\n\n' % (FENCED_CODE_PLACEHOLDER % (len(blocks) - 1))
+
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return FENCED_CODE_RE.sub(replace, text), blocks
+
+
+def restore_fenced_code(html, blocks):
+    """Put the fenced code blocks in a raw HTML block back to their source."""
+    def replace(matched):
+        return '\n%s\n' % blocks[int(matched.group(1))][2]
+
+    return FENCED_CODE_IN_HTML_RE.sub(replace, html).strip()
+
+
+def make_code_block(code, language):
+    """Make a literal block of *code* highlighted as *language* by Sphinx."""
+    # Sphinx highlights only the literal blocks having the same rawsource as its text
+    node = nodes.literal_block(code, code)
+    if language:
+        node['language'] = language
+    return node
+
+
+def make_text_node(text):
+    """Make a node from a pair of text and a flag which means it contains raw HTML."""
+    text, has_rawhtml = text
+    if has_rawhtml:
+        return nodes.raw(format='html', text=text)
+    else:
+        return nodes.Text(text)
+
+
+def merge_texts(contents):
+    """Merge adjacent Text nodes in *contents* into one."""
+    merged = []
+    for node in contents:
+        if merged and isinstance(node, nodes.Text) and isinstance(merged[-1], nodes.Text):
+            merged[-1] = nodes.Text(merged[-1] + node)
+        else:
+            merged.append(node)
+
+    return merged
+
+
+def is_empty_container(node):
+    return node.__class__ is nodes.container and not node.children
+
+
+def fill_node(node, text, children):
+    """Append the content of an element to *node*.
+
+    *text* is a pair of the leading text and a flag which means the text
+    contains raw HTML (or None).  *children* is a list of pairs of the
+    converted child node and its tail (in the same form as *text*).
+
+    For the nodes having block nodes (ex. list items), consecutive texts and
+    inline nodes are grouped into a paragraph.  Empty containers (ex. empty
+    ``<div>``) are dropped, and adjacent texts are merged into a Text node.
+    All contents are appended to *node* at once.
+    """
+    merge = False  # adjacent texts may appear
+    if not isinstance(node, HAVING_BLOCK_NODE):
+        contents = []
+        if text:
+            contents.append(make_text_node(text))
+        for subnode, tail in children:
+            if is_empty_container(subnode):
+                merge = True
+            else:
+                contents.append(subnode)
+                merge = merge or isinstance(subnode, nodes.Text)
+            if tail:
+                contents.append(make_text_node(tail))
+
+        if merge:
+            contents = merge_texts(contents)
+        node.extend(contents)
+        return node
+
+    contents = []  # block nodes, and lists of inline nodes grouped into a paragraph
+    inlines = None  # inline nodes of the paragraph being grouped
+    if text:
+        if text[1]:
+            contents.append(make_text_node(text))
+        else:
+            inlines = [nodes.Text(text[0])]
+            contents.append(inlines)
+    for subnode, tail in children:
+        if isinstance(subnode, INLINE_NODES):
+            if inlines is None:
+                inlines = []
+                contents.append(inlines)
+            inlines.append(subnode)
+            merge = merge or isinstance(subnode, nodes.Text)
+        elif is_empty_container(subnode):
+            merge = True
+        else:
+            inlines = None
+            contents.append(subnode)
+
+        if tail:
+            if tail[1]:
+                inlines = None
+                contents.append(make_text_node(tail))
+            elif inlines is None:
+                inlines = [nodes.Text(tail[0])]
+                contents.append(inlines)
+            else:
+                inlines.append(nodes.Text(tail[0]))
+
+    node.extend(nodes.paragraph('', '', *(merge_texts(content) if merge else content))
+                if isinstance(content, list) else content
+                for content in contents)
+    return node
+
+
+class Serializer(object):
+    #: A list to collect the sections created (or None)
+    sections = None
+
+    def __init__(self, markdown):
+        from markdown.util import HTML_PLACEHOLDER, STX, ETX
+
+        self.markdown = markdown
+        self.handlers = self.get_handlers()
+        self.deferred = []  # pairs of the nodes made by make_node() and their elements
+        self.stx = STX
+        self.escaped_text_re = re.compile(r'%s(\d+)%s|%s' % (STX, ETX, HTML_PLACEHOLDER % r'([0-9]+)'))
+
+    def __call__(self, element):
+        return self.visit(element)
+
+    @classmethod
+    def get_handlers(cls):
+        """Return the tag-to-handler table of the class.
+
+        The table is built from ``visit_<tag>`` methods on first use, and
+        inherits the handlers of the base classes.
+        """
+        if '_handlers' not in cls.__dict__:
+            handlers = {}
+            for base in reversed(cls.__bases__):
+                if hasattr(base, 'get_handlers'):
+                    handlers.update(base.get_handlers())
+            for name, method in vars(cls).items():
+                if name.startswith('visit_'):
+                    handlers[name[6:]] = method
+
+            cls._handlers = handlers
+
+        return cls._handlers
+
+    @classmethod
+    def register(cls, tag, handler):
+        """Register a handler for elements named *tag*.
+
+        The *handler* is called with the serializer and the element, and
+        should return a docutils node.
+        """
+        cls.get_handlers()[tag] = handler
+
+    def visit(self, element):
+        """Serialize *element* to a docutils node.
+
+        The handlers do not serialize the children of elements by themselves;
+        :meth:`make_node` defers them to this loop.  The tree is walked in
+        document order with an explicit stack, so the depth of nesting is not
+        limited by the recursion limit.  Each node is filled after its
+        children, because attaching a node to a deep tree walks up to the
+        root.
+        """
+        handlers = self.handlers
+        outer, self.deferred = self.deferred, []  # the deferred nodes of the caller are kept
+        try:
+            node = self.call_handler(element)
+            deferred = self.deferred
+            stack = []
+            while True:
+                if deferred:
+                    for subnode, subelement in reversed(deferred):
+                        text = None
+                        if subelement.text and subelement.text != "\n":
+                            text = self.unescape(subelement.text, rawHtml=True)
+                        stack.append((subnode, text, [], iter(subelement)))
+                    del deferred[:]
+                elif not stack:
+                    return node
+
+                subnode, text, children, iterator = stack[-1]
+                for child in iterator:
+                    tail = None
+                    if child.tail and child.tail != "\n":
+                        tail = self.unescape(child.tail, rawHtml=True)
+                    handler = handlers.get(child.tag)
+                    if handler is None:
+                        raise RuntimeError('Unknown element: %r' % child)
+                    children.append((handler(self, child), tail))
+                    if deferred:
+                        break  # serialize the children of the child first
+                else:
+                    stack.pop()
+                    fill_node(subnode, text, children)
+        finally:
+            self.deferred = outer
+
+    def call_handler(self, element):
+        handler = self.handlers.get(element.tag)
+        if handler is None:
+            raise RuntimeError('Unknown element: %r' % element)
+        else:
+            return handler(self, element)
+
+    def unescape(self, text, rawHtml=False):
+        """Unescape characters and stashed HTML in *text* in a single pass.
+
+        Returns a pair of the unescaped text and a flag which means the text
+        contains raw HTML.  Raw HTML is expanded only if *rawHtml* is true;
+        HTML entities are always expanded.
+        """
+        if self.stx not in text:
+            return text, False
+
+        stash = self.markdown.htmlStash.rawHtmlBlocks
+        has_rawhtml = False
+        pieces = []
+        pos = 0
+        for matched in self.escaped_text_re.finditer(text):
+            pieces.append(text[pos:matched.start()])
+            char, html_id = matched.groups()
+            if char:
+                pieces.append(chr(int(char)))
+            else:
+                html = stash[int(html_id)][0]
+                if '\x1f' in html:  # a raw HTML block having fenced code blocks
+                    html = restore_fenced_code(html, self.markdown.fenced_code_blocks)
+                if HTML_ENTITY_RE.match(html):
+                    pieces.append(html)  # unescape HTML entities only
+                else:
+                    has_rawhtml = True
+                    if rawHtml:
+                        pieces.append(html)
+                    else:
+                        pieces.append(matched.group(0))
+            pos = matched.end()
+        pieces.append(text[pos:])
+
+        return ''.join(pieces), has_rawhtml
+
+    def unescape_char(self, text, rawHtml=False):
+        return self.unescape(text, rawHtml)[0]
+
+    def make_text(self, text):
+        text, has_rawhtml = self.unescape(text, rawHtml=True)
+        if has_rawhtml:
+            return nodes.raw(format='html', text=text)
+        else:
+            return nodes.Text(text)
+
+    def iter_children(self, element):
+        """Serialize the children of *element* one by one.
+
+        The children are detached from *element* to release them as soon as
+        they are serialized.
+        """
+        if element.text and element.text != "\n":
+            yield self.make_text(element.text)
+
+        children = list(element)
+        children.reverse()
+        element.clear()
+        while children:
+            child = children.pop()
+            subnode = self.visit(child)
+            if not is_empty_container(subnode):
+                yield subnode
+            if child.tail and child.tail != "\n":
+                yield self.make_text(child.tail)
+
+    def make_node(self, cls, element):
+        """Make a node of *cls* for *element*.
+
+        The children of *element* are serialized and appended to the node
+        later by :meth:`visit`.
+        """
+        node = cls()
+        if len(element):
+            self.deferred.append((node, element))
+        elif element.text and element.text != "\n":  # no children; fill it now
+            fill_node(node, self.unescape(element.text, rawHtml=True), ())
+        return node
+
+    def visit_div(self, element):
+        return self.make_node(nodes.container, element)
+
+    def visit_headings(self, element):
+        section = nodes.section(level=int(element.tag[1]))
+        section += self.make_node(nodes.title, element)
+        if self.sections is not None:
+            self.sections.append(section)
+        return section
+
+    visit_h1 = visit_headings
+    visit_h2 = visit_headings
+    visit_h3 = visit_headings
+    visit_h4 = visit_headings
+    visit_h5 = visit_headings
+    visit_h6 = visit_headings
+
+    def visit_p(self, element):
+        return self.make_node(nodes.paragraph, element)
+
+    def visit_em(self, element):
+        return self.make_node(nodes.emphasis, element)
+
+    def visit_strong(self, element):
+        return self.make_node(nodes.strong, element)
+
+    def visit_code(self, element):
+        return nodes.literal(text=self.unescape_char(element.text))
+
+    def visit_a(self, element):
+        href = element.get('href')
+        if href and href.startswith(MAILTO):
+            # an automatic link to the e-mail address obfuscated by Python-Markdown
+            refuri = unescape_email(href)
+            refnode = nodes.reference('', refuri[7:], refuri=refuri)  # strip mailto:
+        else:
+            refnode = self.make_node(nodes.reference, element)
+            if href:
+                refnode['refuri'] = href
+        if element.get('title'):
+            refnode['reftitle'] = self.unescape_char(element.get('title'))
+        return refnode
+
+    def visit_img(self, element):
+        image = self.make_node(nodes.image, element)
+        if element.get('alt'):
+            image['alt'] = self.unescape_char(element.get('alt'))
+        if element.get('src'):
+            image['uri'] = self.unescape_char(element.get('src'))
+        if element.get('title'):
+            # FIXME: Sphinx does not process reftitle attribute
+            image['reftitle'] = self.unescape_char(element.get('title'))
+        return image
+
+    def visit_ul(self, element):
+        return self.make_node(nodes.bullet_list, element)
+
+    def visit_ol(self, element):
+        return self.make_node(nodes.enumerated_list, element)
+
+    def visit_li(self, element):
+        return self.make_node(nodes.list_item, element)
+
+    def visit_pre(self, element):
+        return nodes.literal_block(text=self.unescape_char(element[0].text))
+
+    def visit_fenced_code(self, element):
+        code, language, _ = self.markdown.fenced_code_blocks[int(element.get('index'))]
+        return make_code_block(code, language)
+
+    def visit_blockquote(self, element):
+        return self.make_node(nodes.literal_block, element)
+
+
+class TimeBudgetExceeded(Exception):
+    """Raised if a conversion takes longer than its time budget."""
+
+
+time_budget = threading.local()
+
+
+@contextmanager
+def limit_time(seconds):
+    """Limit the time of conversions in the block to *seconds*.
+
+    :exc:`TimeBudgetExceeded` is raised from the conversion after the time
+    is up.  No limit if *seconds* is None or zero.  The limit of an outer
+    block is kept if it is earlier.
+    """
+    deadline = getattr(time_budget, 'deadline', None)
+    if seconds:
+        time_budget.deadline = min(clock() + seconds, deadline or float('inf'))
+    try:
+        yield
+    finally:
+        time_budget.deadline = deadline
+
+
+def check_time_budget():
+    deadline = getattr(time_budget, 'deadline', None)
+    if deadline is not None and clock() > deadline:
+        raise TimeBudgetExceeded()
+
+
+def create_markdown(serializer_class=Serializer):
+    """Create a Markdown engine configured to emit docutils nodes."""
+    from markdown import Markdown
+    from markdown.odict import OrderedDict
+    from sphinxcontrib.markdown import inline
+
+    md = Markdown()
+    md.serializer = serializer_class(md)
+    md.stripTopLevelTags = False
+    md.preprocessors.add('fenced_code', FencedCodePreprocessor(md), '_begin')
+    md.parser.blockprocessors.add('fenced_code', FencedCodeProcessor(md), '_begin')
+    md.treeprocessors['inline'] = inline.InlineProcessor(md)
+    md.treeprocessors.add('defer_pathological', inline.DeferPathologicalText(), '<inline')
+    md.treeprocessors.add('parse_pathological', inline.ParsePathologicalText(), '>inline')
+    md.postprocessors = OrderedDict()
+    md.postprocessors['section'] = SectionPostprocessor()
+    md.postprocessors['strip'] = StripPostprocessor()
+    return md
+
+
+class MarkdownEnginePool(object):
+    """A pool of configured Markdown engines.
+
+    Engines are created on demand and reused across documents.  An engine is
+    never shared by two conversions at the same time, so the pool is safe to
+    use from multiple threads (and from forked reader processes).
+    """
+
+    def __init__(self, factory=create_markdown):
+        self.factory = factory
+        self.engines = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.engines:
+                return self.engines.pop()
+
+        return self.factory()
+
+    def release(self, md):
+        md.reset()
+        del md.parser.state[:]  # left by a conversion aborted in a nested block
+        with self.lock:
+            self.engines.append(md)
+
+    @contextmanager
+    def engine(self):
+        md = self.acquire()
+        try:
+            yield md
+        finally:
+            self.release(md)
+
+
+engine_pool = MarkdownEnginePool()
+
+
+def md2node(text):
+    with engine_pool.engine() as md:
+        try:
+            return md.convert(text)
+        except RecursionError:
+            pass  # nested too deeply for the block parser of Python-Markdown
+
+    return get_backend('direct').md2node(text)
+
+
+def parse_markdown(md, text):
+    """Parse *text* into an ElementTree; the serialization is not done."""
+    lines = text.split("\n")
+    for preprocessor in md.preprocessors.values():
+        lines = preprocessor.run(lines)
+
+    root = md.parser.parseDocument(lines).getroot()
+    for treeprocessor in md.treeprocessors.values():
+        newroot = treeprocessor.run(root)
+        if newroot is not None:
+            root = newroot
+
+        if hasattr(treeprocessor, 'stashed_nodes'):
+            treeprocessor.stashed_nodes = {}  # release inline elements
+
+    return root
+
+
+def iter_md2node(text, sections=None):
+    """Convert *text* to docutils nodes, yielding the top-level nodes.
+
+    Unlike :func:`md2node`, each top-level section is yielded as soon as its
+    extent is known, and the intermediate ElementTree is released while
+    serializing.  If *sections* is given, the sections created are appended
+    to it in document order.
+    """
+    if not text.strip():
+        return
+
+    with engine_pool.engine() as md:
+        try:
+            root = parse_markdown(md, text)
+        except RecursionError:
+            root = None  # nested too deeply for the block parser of Python-Markdown
+
+        if root is not None:
+            md.serializer.sections = sections
+            try:
+                for node in nest_sections(md.serializer.iter_children(root)):
+                    yield node
+            finally:
+                md.serializer.sections = None
+            return
+
+    for node in get_backend('direct').iter_md2node(text, sections):
+        yield node
+
+
+def convert_with_timings(text, timings, sections=None):
+    """Convert *text* stage by stage, recording the elapsed time of stages.
+
+    The time of each stage (``markdown``, ``serialize`` and ``sections``) is
+    stored to the dict *timings*.  Returns a list of the top-level nodes.
+    """
+    if not text.strip():
+        return []
+
+    started = clock()
+    with engine_pool.engine() as md:
+        try:
+            root = parse_markdown(md, text)
+        except RecursionError:
+            root = None  # nested too deeply for the block parser of Python-Markdown
+        if root is None:
+            return get_backend('direct').convert_with_timings(text, timings, sections)
+        timings['markdown'] = clock() - started
+
+        started = clock()
+        md.serializer.sections = sections
+        try:
+            flat_nodes = list(md.serializer.iter_children(root))
+        finally:
+            md.serializer.sections = None
+        timings['serialize'] = clock() - started
+
+    started = clock()
+    top_level_nodes = list(nest_sections(flat_nodes))
+    timings['sections'] = clock() - started
+
+    return top_level_nodes
+
+
+def get_backend(name):
+    """Return the module of the conversion backend *name*.
+
+    A backend module provides ``md2node()``, ``iter_md2node()``,
+    ``convert_with_timings()`` and ``convert_block()``.
+    """
+    try:
+        return import_module(BACKENDS[name])
+    except KeyError:
+        raise ValueError('Unknown markdown_backend: %r (choose from %s)' %
+                         (name, ', '.join(sorted(BACKENDS))))
+
+
+def convert_block(text, references):
+    """Convert a block of *text* using *references* without nesting sections."""
+    from sphinxcontrib.markdown.incremental import convert_block
+    return convert_block(text, references)
+
+
+def get_parse_cache(config, srcdir):
+    """Return the parse cache configured by ``markdown_cache_dir`` (or None)."""
+    if config.markdown_cache_dir:
+        path = os.path.join(srcdir, config.markdown_cache_dir)
+        version = '%s/%s' % (__version__, config.markdown_backend)
+        return ParseCache(path, config.markdown_cache_size, version)
+    else:
+        return None
+
+
+def get_time_budget(config):
+    """Return ``markdown_time_budget`` in seconds (or None).
+
+    The value is given as a string if it is overridden by ``-D`` option.
+    """
+    if config.markdown_time_budget:
+        return float(config.markdown_time_budget)
+    else:
+        return None
+
+
+fragment_cache = FragmentCache(0)
+
+
+def get_fragment_cache(config):
+    """Return the fragment cache sized by ``markdown_fragment_cache_size`` (or None)."""
+    if config.markdown_fragment_cache_size > 0:
+        if fragment_cache.max_entries != config.markdown_fragment_cache_size:
+            fragment_cache.resize(config.markdown_fragment_cache_size)
+        return fragment_cache
+    else:
+        return None
+
+
+#: the incremental converters of the recently read documents (least recently used first)
+incremental_converters = OrderedDict()
+incremental_converters_lock = threading.Lock()
+
+
+def get_incremental_converter(env, cache):
+    """Return the incremental converter for the current document.
+
+    The converters of the :data:`MAX_INCREMENTAL_CONVERTERS` most recently
+    read documents are kept in the process; the least recently used one is
+    dropped beyond that.  If ``markdown_incremental`` is disabled, a new
+    converter is returned; it converts the document block by block to share
+    them via the fragment cache.
+    """
+    from sphinxcontrib.markdown.incremental import IncrementalConverter
+
+    backend = env.config.markdown_backend
+    fragments = get_fragment_cache(env.config)
+    if not env.config.markdown_incremental:
+        return IncrementalConverter(backend=backend, fragments=fragments, reuse_blocks=False)
+
+    key = (env.srcdir, env.docname, backend)
+    with incremental_converters_lock:
+        converter = incremental_converters.pop(key, None)
+        if converter is None:
+            converter = IncrementalConverter(backend=backend)
+        incremental_converters[key] = converter  # mark as recently used
+        while len(incremental_converters) > MAX_INCREMENTAL_CONVERTERS:
+            incremental_converters.popitem(last=False)
+    converter.cache = cache
+    converter.fragments = fragments
+    return converter
+
+
+def get_preparsed(env, text):
+    """Return the doctree of the document being read if it is converted ahead (or None)."""
+    from sphinxcontrib.markdown.preparse import get_preparsed
+    return get_preparsed(env, text)
+
+
+def warning(env, message):
+    """Emit a warning on the document being read."""
+    try:
+        from sphinx.util import logging
+        logging.getLogger(__name__).warning(message, location=env.docname)
+    except ImportError:  # Sphinx-1.5 or older
+        env.warn(env.docname, message)
+
+
+class MarkdownParser(parsers.Parser):
+    supported = ('markdown', 'md')
+
+    #: the conversion backend used outside of Sphinx
+    default_backend = 'markdown'
+
+    def convert(self, inputstring, document, sections=None, timings=None):
+        """Convert *inputstring* to an iterable of top-level nodes.
+
+        If *sections* is given, the sections in the result are appended to it
+        in document order.  If *timings* is given, the elapsed time of each
+        stage is stored to it.
+        """
+        env = getattr(document.settings, 'env', None)
+        if env is not None and env.config.markdown_preparse_jobs > 0:
+            started = clock()
+            doctree = get_preparsed(env, inputstring)
+            if doctree is not None:
+                cache = get_parse_cache(env.config, env.srcdir)
+                if cache:
+                    cache.set(inputstring, doctree)
+                if sections is not None and doctree:
+                    sections.extend(doctree.traverse(nodes.section))
+                if timings is not None:
+                    timings['convert'] = clock() - started
+                return doctree
+
+        if env is None:
+            cache = None  # not running under Sphinx
+            blockwise = False
+            backend = get_backend(self.default_backend)
+        else:
+            cache = get_parse_cache(env.config, env.srcdir)
+            blockwise = env.config.markdown_incremental or env.config.markdown_fragment_cache_size > 0
+            backend = get_backend(env.config.markdown_backend)
+
+        if cache is None and not blockwise:
+            if timings is None:
+                return backend.iter_md2node(inputstring, sections)
+            else:
+                return backend.convert_with_timings(inputstring, timings, sections)
+
+        started = clock()
+        doctree = None
+        if cache:
+            doctree = cache.get(inputstring)
+
+        if doctree is None:
+            if blockwise:
+                doctree = get_incremental_converter(env, cache).convert(inputstring)
+            else:
+                doctree = backend.md2node(inputstring)
+
+            if cache:
+                cache.set(inputstring, doctree)
+
+        if sections is not None and doctree:
+            sections.extend(doctree.traverse(nodes.section))
+
+        if timings is not None:
+            timings['convert'] = clock() - started
+
+        return doctree
+
+    def parse(self, inputstring, document):
+        from sphinxcontrib.markdown import inline
+
+        self.setup_parse(inputstring, document)
+        self.document = document
+        env = getattr(document.settings, 'env', None)
+        if env is not None:
+            outdated.record(env)
+        if env is not None and env.config.markdown_profile:
+            timings = {}
+        else:
+            timings = None
+
+        sections = []
+        budget = get_time_budget(env.config) if env is not None else None
+        try:
+            with limit_time(budget), inline.record_fallbacks() as fallbacks:
+                for node in self.convert(inputstring, document, sections, timings):
+                    self.document += node
+            if fallbacks and env is not None:
+                warning(env, 'Markdown texts having too many delimiters (*, _ or `) are parsed in linear time '
+                             '(%d texts); links, raw HTML and entities in them are kept as text' % len(fallbacks))
+        except TimeBudgetExceeded:
+            if env is None:
+                raise  # limited by the caller
+            del self.document[:]
+            sections = []
+            warning(env, 'Markdown conversion exceeded markdown_time_budget (%s sec); '
+                         'the document is left empty' % budget)
+
+        # assign IDs to all sections
+        started = clock()
+        for node in sections:
+            self.document.note_implicit_target(node)
+
+        if timings is not None:
+            timings['targets'] = clock() - started
+            profiling.record(env, inputstring, document, timings)
+        self.finish_parse()
+
+
+def on_env_before_read_docs(app, env, docnames):
+    if app.config.markdown_preparse_jobs > 0 or 'sphinxcontrib.markdown.preparse' in sys.modules:
+        from sphinxcontrib.markdown import preparse
+        preparse.on_env_before_read_docs(app, env, docnames)
+
+
+def on_env_updated(app, env):
+    if 'sphinxcontrib.markdown.preparse' in sys.modules:
+        from sphinxcontrib.markdown import preparse
+        preparse.stop(app, env)
+
+
+def on_build_finished(app, exception):
+    on_env_updated(app, app.env)  # the build may be aborted during reading
+
+    cache = get_parse_cache(app.config, app.srcdir)
+    if cache:
+        cache.prune()
+
+    fragments = get_fragment_cache(app.config)
+    if fragments is not None:
+        profiling.info(app, 'markdown fragment cache: %(hits)d hits, %(misses)d misses '
+                            '(%(entries)d/%(max_entries)d entries)' % fragments.stats())
+
+
+def setup(app):
+    app.add_config_value('markdown_backend', 'markdown', 'env')
+    app.add_config_value('markdown_cache_dir', None, '')
+    app.add_config_value('markdown_cache_size', 100 * 1024 * 1024, '')
+    app.add_config_value('markdown_fragment_cache_size', 0, '')
+    app.add_config_value('markdown_incremental', False, '')
+    app.add_config_value('markdown_preparse_jobs', 0, '')
+    app.add_config_value('markdown_profile', False, '')
+    app.add_config_value('markdown_profile_report', None, '')
+    app.add_config_value('markdown_time_budget', None, 'env')
+    app.connect('env-before-read-docs', on_env_before_read_docs)
+    app.connect('env-updated', on_env_updated)
+    app.connect('build-finished', on_build_finished)
+    outdated.setup(app)
+    profiling.setup(app)
+
+    if hasattr(app, 'add_source_suffix'):  # Sphinx-1.8 or above
+        app.add_source_suffix('.md', 'markdown')
+        app.add_source_parser(MarkdownParser)
+    else:
+        app.add_source_parser('.md', MarkdownParser)
+
+    return {
+        'version': __version__,
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
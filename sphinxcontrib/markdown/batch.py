@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.batch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Batch conversion of Markdown files to doctrees in a process pool.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import, print_function
+
+import io
+import os
+import sys
+import pickle
+import argparse
+import multiprocessing
+from sphinxcontrib.markdown import md2node
+
+DEFAULT_CHUNKSIZE = 16
+
+
+def chunked(items, chunksize):
+    for i in range(0, len(items), chunksize):
+        yield items[i:i + chunksize]
+
+
+def read_file(filename, encoding='utf-8'):
+    with io.open(filename, encoding=encoding) as fd:
+        return fd.read()
+
+
+def convert_texts(texts):
+    """Convert a chunk of Markdown texts to pickled doctrees."""
+    return [pickle.dumps(md2node(text), pickle.HIGHEST_PROTOCOL) for text in texts]
+
+
+def convert_files(filenames):
+    """Convert a chunk of Markdown files to pickled doctrees."""
+    return convert_texts([read_file(filename) for filename in filenames])
+
+
+def imap_chunks(func, items, processes=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Apply *func* to the chunks of *items*, yielding results in order.
+
+    Each worker process converts a whole chunk at once, so the engines of
+    the worker are reused across the items, and the results are sent back
+    per chunk.
+    """
+    items = list(items)
+    chunks = chunked(items, chunksize)
+    if processes == 1 or len(items) <= chunksize:
+        for chunk in chunks:
+            for result in func(chunk):
+                yield result
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            for results in pool.imap(func, chunks):
+                for result in results:
+                    yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+def batch_md2node(texts, processes=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Convert Markdown *texts* in a process pool.
+
+    Yields pickled doctrees (the results of :func:`md2node`) in the order of
+    *texts*.
+    """
+    return imap_chunks(convert_texts, texts, processes, chunksize)
+
+
+def batch_convert_files(filenames, processes=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Convert Markdown files in a process pool.
+
+    Files are read by the workers.  Yields pairs of the filename and its
+    pickled doctree in the order of *filenames*.
+    """
+    filenames = list(filenames)
+    return zip(filenames, imap_chunks(convert_files, filenames, processes, chunksize))
+
+
+def get_basedir(filenames):
+    """Return the deepest directory containing all of *filenames*."""
+    dirnames = [os.path.dirname(os.path.abspath(filename)).split(os.sep) for filename in filenames]
+    return os.sep.join(os.path.commonprefix(dirnames)) or os.sep
+
+
+def get_output_filename(filename, outdir=None, basedir=None):
+    """Return the doctree filename of *filename*.
+
+    With *outdir*, the path of *filename* relative to *basedir* (default:
+    its directory) is kept under *outdir*, so the files of the same name in
+    different directories do not overwrite each other.
+    """
+    basename = os.path.splitext(filename)[0] + '.doctree'
+    if outdir:
+        basedir = basedir or os.path.dirname(os.path.abspath(filename))
+        return os.path.join(outdir, os.path.relpath(os.path.abspath(basename), basedir))
+    else:
+        return basename
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert Markdown files to pickled doctrees')
+    parser.add_argument('filenames', nargs='+', metavar='FILE', help='Markdown files')
+    parser.add_argument('-o', '--outdir',
+                        help='output directory (default: same directory as each input)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help='number of files converted per task (default: %d)' % DEFAULT_CHUNKSIZE)
+    options = parser.parse_args(argv)
+
+    basedir = get_basedir(options.filenames)
+    try:
+        for filename, doctree in batch_convert_files(options.filenames, options.jobs, options.chunksize):
+            output = get_output_filename(filename, options.outdir, basedir)
+            if options.outdir and not os.path.isdir(os.path.dirname(output)):
+                os.makedirs(os.path.dirname(output))
+            with open(output, 'wb') as fd:
+                fd.write(doctree)
+    except (IOError, OSError) as exc:
+        print('Error: %s' % exc, file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
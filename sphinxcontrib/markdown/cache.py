@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.cache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Caches of converted doctrees.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+CACHE_SUFFIX = '.pickle'
+
+
+def get_markdown_version():
+    import markdown
+    return getattr(markdown, 'version', None) or markdown.__version__
+
+
+class ParseCache(object):
+    """A cache of converted doctrees keyed by the digest of Markdown source.
+
+    Each entry is stored as a pickle file named by the digest of the source,
+    the version of this extension and the version of Markdown.  Entries are
+    written atomically, so the cache can be shared by parallel readers.  The
+    modification time of an entry is updated on every hit, and :meth:`prune`
+    evicts the least recently used entries to keep the cache under
+    *max_size* bytes.
+    """
+
+    def __init__(self, path, max_size, version=''):
+        self.path = path
+        self.max_size = max_size
+        self.version = version
+
+    def digest(self, source):
+        hashed = hashlib.sha1()
+        for value in (self.version, get_markdown_version(), source):
+            hashed.update(value.encode('utf-8'))
+            hashed.update(b'\0')
+
+        return hashed.hexdigest()
+
+    def filename(self, source):
+        return os.path.join(self.path, self.digest(source) + CACHE_SUFFIX)
+
+    def get(self, source):
+        filename = self.filename(source)
+        try:
+            with open(filename, 'rb') as fd:
+                node = pickle.load(fd)
+        except (IOError, OSError):
+            return None  # not cached yet
+        except Exception:
+            return None  # broken entry; it will be overwritten
+
+        try:
+            os.utime(filename, None)  # mark as recently used
+        except OSError:
+            pass
+
+        return node
+
+    def set(self, source, node):
+        if not os.path.isdir(self.path):
+            try:
+                os.makedirs(self.path)
+            except OSError:
+                if not os.path.isdir(self.path):  # not created by other process
+                    raise
+
+        fd, tmpname = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(node, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmpname, self.filename(source))
+        except Exception:
+            os.unlink(tmpname)
+            raise
+
+    def prune(self):
+        """Evict the least recently used entries over the size limit."""
+        if not os.path.isdir(self.path):
+            return
+
+        entries = []
+        for filename in os.listdir(self.path):
+            if filename.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.path, filename)
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    pass
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class FragmentCache(object):
+    """An in-memory LRU cache of converted fragments (lists of nodes).
+
+    At most *max_entries* fragments are kept; the cache is disabled if it is
+    0.  :meth:`get` returns deep copies of the cached nodes, so the nodes
+    returned can be inserted to a document safely.  The numbers of hits and
+    misses are counted in :attr:`hits` and :attr:`misses`.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            subnodes = self.entries.pop(key, None)
+            if subnodes is None:
+                self.misses += 1
+                return None
+
+            self.entries[key] = subnodes  # mark as recently used
+            self.hits += 1
+
+        return [node.deepcopy() for node in subnodes]
+
+    def set(self, key, subnodes):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = subnodes
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def resize(self, max_entries):
+        """Change the maximum number of entries; the oldest entries are evicted."""
+        with self.lock:
+            self.max_entries = max_entries
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                'max_entries': self.max_entries}
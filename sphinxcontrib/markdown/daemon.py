@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.daemon
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A long-lived conversion server for live previews in editors.
+
+    The server keeps the Markdown engines warm and answers JSON-RPC 2.0
+    requests (a JSON object per line) on stdin/stdout or on a Unix domain
+    socket.  The last results of recently used paths are kept, so a
+    request for an unchanged document is answered without converting it
+    again.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import json
+import stat
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from docutils.io import StringOutput
+from docutils.utils import new_document
+from docutils.writers import get_writer_class
+from sphinxcontrib.markdown import BACKENDS, limit_time, MarkdownParser, TimeBudgetExceeded
+from sphinxcontrib.markdown.batch import read_file
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+try:
+    str_types = (str, unicode)  # NOQA
+except NameError:  # Python 3
+    str_types = (str,)
+
+try:
+    from docutils.frontend import get_default_settings
+except ImportError:  # docutils-0.17 or older
+    from docutils.frontend import OptionParser
+
+    def get_default_settings(*components):
+        return OptionParser(components=components).get_default_values()
+
+FORMATS = ('pseudoxml', 'html')
+CONVERT_PARAMS = ('text', 'path', 'format', 'backend')
+MAX_RESULTS = 64  # paths whose last results are kept
+WARM_UP_TEXT = u"# Headings\n\nHello *world* and `code`\n\n* item\n"
+
+# error codes of JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+CONVERSION_ERROR = -32000
+
+
+class RPCError(Exception):
+    """An error answered to the client."""
+
+    def __init__(self, code, message):
+        super(RPCError, self).__init__(message)
+        self.code = code
+
+
+class Converter(object):
+    """Convert Markdown texts to pseudo-XML or HTML.
+
+    The texts are parsed into docutils documents by :class:`MarkdownParser`.
+    The last result of each path is kept with the digest of its text; it is
+    returned while the text and the options of the requests are not changed.
+    The results of the :data:`MAX_RESULTS` most recently used paths are
+    kept.
+    """
+
+    def __init__(self, backend='markdown', time_budget=None):
+        self.backend = backend
+        self.time_budget = time_budget
+        self.writer_class = get_writer_class('html')
+        self.settings = get_default_settings(MarkdownParser, self.writer_class)
+        self.results = OrderedDict()  # path -> ((digest, format, backend), output)
+        self.lock = threading.Lock()
+
+    def parse(self, text, backend):
+        """Parse *text* into a docutils document."""
+        parser = MarkdownParser()
+        parser.default_backend = backend
+        document = new_document('<markdown>', self.settings)
+        with limit_time(self.time_budget):
+            parser.parse(text, document)
+        return document
+
+    def render(self, document, format):
+        if format == 'html':
+            writer = self.writer_class()
+            writer.write(document, StringOutput(encoding='unicode'))
+            writer.assemble_parts()
+            return writer.parts['body']
+        else:
+            return document.pformat()
+
+    def convert(self, text=None, path=None, format='pseudoxml', backend=None):
+        """Convert *text* (or the content of the file *path* if not given).
+
+        Returns a dict having the ``output`` and the ``cached`` flag which
+        means the output is the last result of *path*.
+        """
+        backend = backend or self.backend
+        if format not in FORMATS:
+            raise RPCError(INVALID_PARAMS, 'Unknown format: %r' % format)
+        elif backend not in BACKENDS:
+            raise RPCError(INVALID_PARAMS, 'Unknown backend: %r' % backend)
+
+        if text is None:
+            if path is None:
+                raise RPCError(INVALID_PARAMS, 'Either text or path is required')
+            try:
+                text = read_file(path)
+            except (IOError, OSError) as exc:
+                raise RPCError(CONVERSION_ERROR, str(exc))
+
+        key = (hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest(), format, backend)
+        if path is not None:
+            with self.lock:
+                last = self.results.pop(path, None)
+                if last:
+                    self.results[path] = last  # the most recently used one
+            if last and last[0] == key:
+                return {'output': last[1], 'cached': True}
+
+        try:
+            output = self.render(self.parse(text, backend), format)
+        except TimeBudgetExceeded:
+            raise RPCError(CONVERSION_ERROR, 'Markdown conversion exceeded the time budget (%s sec)' %
+                           self.time_budget)
+
+        if path is not None:
+            with self.lock:
+                self.results.pop(path, None)
+                self.results[path] = (key, output)
+                while len(self.results) > MAX_RESULTS:
+                    self.results.popitem(last=False)
+        return {'output': output, 'cached': False}
+
+
+class Service(object):
+    """Answer JSON-RPC requests with :class:`Converter`.
+
+    The methods are ``convert`` (with named parameters of
+    :meth:`Converter.convert`) and ``shutdown``.
+    """
+
+    def __init__(self, converter):
+        self.converter = converter
+        self.stopped = threading.Event()
+
+    def call(self, method, params):
+        if method == 'convert':
+            if not isinstance(params, dict) or set(params) - set(CONVERT_PARAMS):
+                raise RPCError(INVALID_PARAMS, 'Parameters must be an object of %s' % ', '.join(CONVERT_PARAMS))
+            for name, value in params.items():
+                if value is not None and not isinstance(value, str_types):
+                    raise RPCError(INVALID_PARAMS, 'Parameter %s must be a string or null' % name)
+            # null is taken as not given
+            return self.converter.convert(**dict((k, v) for k, v in params.items() if v is not None))
+        elif method == 'shutdown':
+            self.stopped.set()
+            return None
+        else:
+            raise RPCError(METHOD_NOT_FOUND, 'Unknown method: %r' % method)
+
+    def handle(self, line):
+        """Answer a request; returns a line of the response (or None for notifications)."""
+        request_id = None
+        notification = False
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise RPCError(PARSE_ERROR, 'Invalid JSON')
+            if not isinstance(request, dict) or 'method' not in request:
+                raise RPCError(INVALID_REQUEST, 'Invalid request')
+
+            request_id = request.get('id')
+            notification = 'id' not in request
+            result = self.call(request['method'], request.get('params', {}))
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RPCError as exc:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': exc.code, 'message': str(exc)}}
+        except Exception as exc:
+            # keep serving; a broken document should not stop the previews of others
+            message = '%s: %s' % (exc.__class__.__name__, exc)
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': CONVERSION_ERROR, 'message': message}}
+
+        if notification:
+            return None  # not answered even if failed
+        return json.dumps(response)
+
+
+def serve_stdio(service, stdin=None, stdout=None):
+    """Answer the requests from *stdin* until EOF or shutdown."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in iter(stdin.readline, ''):
+        if line.strip():
+            response = service.handle(line)
+            if response is not None:
+                stdout.write(response + '\n')
+                stdout.flush()
+        if service.stopped.is_set():
+            break
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for line in iter(self.rfile.readline, b''):
+            if line.strip():
+                response = service.handle(line.decode('utf-8'))
+                if response is not None:
+                    self.wfile.write(response.encode('utf-8') + b'\n')
+                    self.wfile.flush()
+            if service.stopped.is_set():
+                # shutdown() waits for serve_forever() in the main thread
+                threading.Thread(target=self.server.shutdown).start()
+                break
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service):
+        self.service = service
+        socketserver.UnixStreamServer.__init__(self, path, RequestHandler)
+
+
+def serve_socket(service, path):
+    """Answer the requests on the Unix domain socket *path* until shutdown."""
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)  # left by the last server
+
+    server = UnixServer(path, service)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve Markdown conversion for live previews')
+    parser.add_argument('-s', '--socket', metavar='PATH',
+                        help='path to the Unix domain socket (default: stdin and stdout)')
+    parser.add_argument('-b', '--backend', choices=sorted(BACKENDS), default='markdown',
+                        help='conversion backend (default: markdown)')
+    parser.add_argument('--time-budget', type=float, default=None, metavar='SECONDS',
+                        help='time limit of each conversion (default: no limit)')
+    options = parser.parse_args(argv)
+
+    converter = Converter(options.backend, options.time_budget)
+    for format in FORMATS:
+        converter.convert(WARM_UP_TEXT, format=format)  # load the engines and the writer
+
+    service = Service(converter)
+    try:
+        if options.socket:
+            serve_socket(service, options.socket)
+        else:
+            serve_stdio(service)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1119 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.direct
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Direct conversion of Markdown to docutils nodes.
+
+    The block and inline parsers follow the syntax of Python-Markdown, but
+    emit docutils nodes directly; no ElementTree is built and raw HTML is
+    not stashed behind placeholders.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import re
+from operator import itemgetter
+from docutils import nodes
+from markdown import inlinepatterns
+from markdown.preprocessors import ReferencePreprocessor
+from markdown.util import isBlockLevel
+from sphinxcontrib.markdown import (
+    FENCED_CODE_PLACEHOLDER_RE, check_time_budget, clock, extract_fenced_code, fill_node, inline,
+    make_code_block, make_text_node, nest_sections, restore_fenced_code
+)
+
+try:
+    text_type = unicode  # NOQA
+except NameError:  # Python 3
+    text_type = str
+
+TAB_LENGTH = 4
+ESCAPED_CHARS = frozenset('\\`*_{}[]()>#+-.!')
+
+
+def compile_pattern(pattern):
+    # the empty group aligns the numbers of groups to Python-Markdown's ones
+    return re.compile('()' + pattern, re.DOTALL | re.UNICODE)
+
+
+ESCAPE_OR_BACKTICK_RE = re.compile(r'[\\`]')
+ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+BACKTICK_RE = re.compile(r'(`+)(.+?)(?<!`)\1(?!`)', re.DOTALL)
+LINE_BREAK_RE = re.compile(inlinepatterns.LINE_BREAK_RE)
+REFERENCE_RE = compile_pattern(inlinepatterns.REFERENCE_RE)
+LINK_RE = compile_pattern(inlinepatterns.LINK_RE)
+SHORT_REF_RE = compile_pattern(inlinepatterns.SHORT_REF_RE)
+IMAGE_LINK_RE = compile_pattern(inlinepatterns.IMAGE_LINK_RE)
+IMAGE_REFERENCE_RE = compile_pattern(inlinepatterns.IMAGE_REFERENCE_RE)
+AUTOLINK_RE = compile_pattern(inlinepatterns.AUTOLINK_RE)
+AUTOMAIL_RE = compile_pattern(inlinepatterns.AUTOMAIL_RE)
+HTML_RE = compile_pattern(inlinepatterns.HTML_RE)
+ENTITY_RE = compile_pattern(inlinepatterns.ENTITY_RE)
+NEWLINE_CLEANUP_RE = re.compile(r'[ ]?\n', re.MULTILINE)
+
+#: Patterns of links and others in order of priority, with the name of handlers
+LINK_PATTERNS = (
+    (REFERENCE_RE, 'make_reference'),
+    (LINK_RE, 'make_link'),
+    (IMAGE_LINK_RE, 'make_image'),
+    (IMAGE_REFERENCE_RE, 'make_image_reference'),
+    (SHORT_REF_RE, 'make_reference'),
+    (AUTOLINK_RE, 'make_autolink'),
+    (AUTOMAIL_RE, 'make_automail'),
+    (LINE_BREAK_RE, 'make_linebreak'),
+    (HTML_RE, 'make_rawhtml'),
+    (ENTITY_RE, 'make_entity'),
+)
+
+#: Emphasis patterns in order of priority, with the classes of nodes to create
+#: (None means the match is kept as text)
+EMPHASIS_PATTERNS = (
+    (compile_pattern(inlinepatterns.NOT_STRONG_RE), None),
+    (compile_pattern(inlinepatterns.EM_STRONG_RE), (nodes.strong, nodes.emphasis)),
+    (compile_pattern(inlinepatterns.STRONG_EM_RE), (nodes.emphasis, nodes.strong)),
+    (compile_pattern(inlinepatterns.STRONG_RE), (nodes.strong,)),
+    (compile_pattern(inlinepatterns.EMPHASIS_RE), (nodes.emphasis,)),
+    (compile_pattern(inlinepatterns.SMART_EMPHASIS_RE), (nodes.emphasis,)),
+)
+
+HASH_HEADER_RE = re.compile(r'(^|\n)(?P<level>#{1,6})(?P<header>.*?)#*(\n|$)')
+SETEXT_HEADER_RE = re.compile(r'^.*?\n[=-]+[ ]*(\n|$)', re.MULTILINE)
+HR_RE = re.compile(r'^[ ]{0,3}((-+[ ]{0,2}){3,}|(_+[ ]{0,2}){3,}|(\*+[ ]{0,2}){3,})[ ]*', re.MULTILINE)
+OLIST_RE = re.compile(r'^[ ]{0,%d}\d+\.[ ]+(.*)' % (TAB_LENGTH - 1))
+ULIST_RE = re.compile(r'^[ ]{0,%d}[*+-][ ]+(.*)' % (TAB_LENGTH - 1))
+LIST_CHILD_RE = re.compile(r'^[ ]{0,%d}((\d+\.)|[*+-])[ ]+(.*)' % (TAB_LENGTH - 1))
+LIST_INDENT_RE = re.compile(r'^[ ]{%d,%d}((\d+\.)|[*+-])[ ]+.*' % (TAB_LENGTH, TAB_LENGTH * 2 - 1))
+INDENT_RE = re.compile(r'^(([ ]{%d})+)' % TAB_LENGTH)
+QUOTE_RE = re.compile(r'(^|\n)[ ]{0,3}>[ ]?(.*)')
+LEFT_TAG_RE = re.compile(r'^<(?P<tag>[^> ]+)'
+                         r'(\s+[^>"\'/= ]+=(?P<q>[\'"]).*?(?P=q)|\s+[^>"\'/= ]+=[^> ]+|\s+[^>"\'/= ]+)*'
+                         r'\s*/?>?')
+RIGHT_TAG_PATTERNS = ('</%s>', '%s>')
+
+
+def unescape(text):
+    """Expand backslash escapes in *text*."""
+    def repl(matched):
+        if matched.group(1) in ESCAPED_CHARS:
+            return matched.group(1)
+        else:
+            return matched.group(0)
+
+    return ESCAPE_RE.sub(repl, text)
+
+
+def dequote(text):
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    else:
+        return text
+
+
+def mask(text, spans):
+    """Replace the characters of *spans* (pairs of offsets) with NULs."""
+    pieces = []
+    pos = 0
+    for start, end in spans:
+        pieces.append(text[pos:start])
+        pieces.append('\0' * (end - start))
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+
+def split_items(items):
+    """Split inline items into the leading text and pairs of a node and its tail."""
+    text = None
+    children = []
+    for item in items:
+        if isinstance(item, tuple):
+            if item[0] == '\n':
+                continue
+            elif children:
+                children[-1] = (children[-1][0], item)
+            else:
+                text = item
+        else:
+            children.append((item, None))
+
+    return text, children
+
+
+class RawHtml(text_type):
+    """A block of raw HTML."""
+
+
+class InlineParser(object):
+    """Parse inline markups into docutils nodes.
+
+    The result of :meth:`parse` is a list of nodes and text segments; a text
+    segment is a pair of a text and a flag which means the text contains raw
+    HTML.
+    """
+
+    def __init__(self, references):
+        self.references = references
+        self.link_patterns = [(regexp, getattr(self, name)) for regexp, name in LINK_PATTERNS]
+        self.deferred = {}
+
+    def parse(self, text):
+        if inline.is_pathological(text):
+            inline.note_fallback(text)
+            return inline.make_items(text)
+
+        self.deferred.clear()
+        masked, elements = self.parse_elements(text, False)
+        return self.make_items(text, 0, len(text), elements)
+
+    def parse_elements(self, text, nested):
+        """Find the elements in *text*; *nested* means the text is the content of an inline node."""
+        elements = []
+        masked = self.tokenize_code(text, elements)
+        masked = self.tokenize_links(text, masked, elements)
+        elements.sort(key=itemgetter(0))
+        elements = self.emphasize(text, masked, 0, elements, 0, nested)
+        if nested:
+            elements = self.reparse(text, masked, 0, elements, False)
+        return masked, elements
+
+    def fill(self, node, text):
+        masked, elements = self.parse_elements(text, True)
+        fill_node(node, *split_items(self.make_items(text, 0, len(text), elements)))
+        self.defer_leading(node, text, masked, 0, elements)
+        return node
+
+    def tokenize_code(self, text, elements):
+        """Find code spans and backslash escapes; returns masked *text*."""
+        spans = []
+        matched = ESCAPE_OR_BACKTICK_RE.search(text)
+        while matched:
+            start = matched.start()
+            if text[start] == '\\':
+                char = text[start + 1:start + 2]
+                end = start + 2
+                if char in ESCAPED_CHARS and char:
+                    elements.append((start, end, ('text', char)))
+                    spans.append((start, end))
+            else:
+                check_time_budget()
+                code = BACKTICK_RE.match(text, start)
+                if code:
+                    end = code.end()
+                    elements.append((start, end, nodes.literal(text=code.group(2).strip())))
+                    spans.append((start, end))
+                else:
+                    end = start + 1
+
+            matched = ESCAPE_OR_BACKTICK_RE.search(text, end)
+
+        return mask(text, spans)
+
+    def tokenize_links(self, text, masked, elements):
+        """Find links, images, raw HTML and entities; returns masked *text*.
+
+        Like Python-Markdown, each pattern is applied to the whole text in
+        order of priority.  A match is masked at once, and the text is
+        searched again from the beginning.
+        """
+        for regexp, handler in self.link_patterns:
+            matched = regexp.search(masked)
+            while matched:
+                start, end = matched.span()
+                item = handler(text, matched)
+                if item is None:  # an undefined reference
+                    matched = regexp.search(masked, end)
+                else:
+                    # link text is parsed again from the original text
+                    elements[:] = [e for e in elements if not start <= e[0] < end]
+                    elements.append((start, end, item))
+                    masked = mask(masked, [(start, end)])
+                    matched = regexp.search(masked)
+
+        return masked
+
+    def emphasize(self, text, masked, offset, elements, index, nested):
+        """Find emphasis in *masked* by the patterns from *index*.
+
+        *masked* is the masked text of the range starting at *offset*, and
+        *elements* are the elements found in the range.  Like Python-Markdown,
+        each pattern is applied to the whole range repeatedly until it does
+        not match, and the content of emphasis is parsed by the following
+        patterns.  *nested* means the range is the content of an inline node.
+        """
+        for i in range(index, len(EMPHASIS_PATTERNS)):
+            regexp = EMPHASIS_PATTERNS[i][0]
+            matched = regexp.search(masked)
+            while matched:
+                check_time_budget()
+                start = offset + matched.start()
+                end = offset + matched.end()
+                inner = [e for e in elements if start <= e[0] < end]
+                if inner:
+                    elements = [e for e in elements if not start <= e[0] < end]
+                node = self.make_emphasis(text, masked, offset, matched, inner, i, nested)
+                elements.append((start, end, node))
+                elements.sort(key=itemgetter(0))
+
+                # search again from the beginning; the match might be a part
+                # of a larger one
+                masked = mask(masked, [matched.span()])
+                matched = regexp.search(masked)
+
+        return elements
+
+    def make_emphasis(self, text, masked, offset, matched, elements, index, nested):
+        classes = EMPHASIS_PATTERNS[index][1]
+        if classes is None:
+            return ('text', text[offset + matched.start():offset + matched.end()])
+
+        def parse_group(group, index, leading):
+            start, end = matched.span(group)
+            inner = [e for e in elements if offset + start <= e[0] < offset + end]
+            inner = self.emphasize(text, masked[start:end], offset + start, inner, index, True)
+            inner = self.reparse(text, masked[start:end], offset + start, inner, leading)
+            return inner, self.make_items(text, offset + start, offset + end, inner)
+
+        self.nest(elements)
+        node = classes[0]()
+        if len(classes) == 1:
+            inner, items = parse_group(3, index + 1, nested)
+            fill_node(node, *split_items(items))
+            if not nested:
+                start, end = matched.span(3)
+                self.defer_leading(node, text, masked[start:end], offset + start, inner)
+        else:
+            child = fill_node(classes[1](), *split_items(parse_group(3, index + 1, True)[1]))
+            fill_node(node, *split_items([child] + parse_group(4, index, True)[1]))
+        return node
+
+    def defer_leading(self, node, text, masked, offset, elements):
+        """Remember the text before the first child of *node* to parse it again when nested.
+
+        Python-Markdown processes the text of an inline element again only if
+        the element is inside another inline element, which might be found
+        after the element is made.
+        """
+        end = offset + len(masked)
+        for element in elements:
+            if not isinstance(element[2], tuple):
+                end = element[0]
+                break
+
+        if end > offset and text[offset:end] != '\n':  # '\n' is not filled to the node
+            texts = [e for e in elements if e[0] < end]
+            self.deferred[id(node)] = (node, text, masked[:end - offset], offset, texts)
+
+    def nest(self, elements):
+        """Parse the deferred texts of the nodes in *elements* again; they get nested."""
+        for _, _, item in elements:
+            deferred = self.deferred.pop(id(item), None)
+            if deferred:
+                node, text, masked, offset, texts = deferred
+                texts = self.reparse(text, masked, offset, texts, True)
+                leading, children = split_items(self.make_items(text, offset, offset + len(masked), texts))
+                contents = [make_text_node(leading)] if leading else []
+                for child, tail in children:
+                    contents.append(child)
+                    if tail:
+                        contents.append(make_text_node(tail))
+                node[0:1] = contents
+
+    def reparse(self, text, masked, offset, elements, leading):
+        """Apply all emphasis patterns again to the texts following nodes.
+
+        Python-Markdown processes the text and the tail of elements inside an
+        inline element once more with all inline patterns.  This emulates it
+        for the texts between the nodes of the range starting at *offset*;
+        if *leading* is true, the text before the first node is also
+        processed.
+        """
+        results = []
+        texts = []  # text items in the current text
+        pos = offset
+        following = leading
+        for element in elements + [(offset + len(masked), None, None)]:
+            start, end, item = element
+            if isinstance(item, tuple):
+                texts.append(element)
+                continue
+
+            if following and pos < start:
+                spans = [(e[0] - pos, e[1] - pos) for e in texts]
+                local = mask(masked[pos - offset:start - offset], spans)
+                results.extend(self.emphasize(text, local, pos, texts, 0, True))
+            else:
+                results.extend(texts)
+
+            if item is not None:
+                results.append(element)
+            texts = []
+            pos = end
+            following = True
+
+        return results
+
+    def make_items(self, text, start, end, elements):
+        items = []
+        pieces = []
+        has_rawhtml = False
+        pos = start
+        for element_start, element_end, item in elements:
+            if pos < element_start:
+                pieces.append(text[pos:element_start])
+            if isinstance(item, tuple):
+                pieces.append(item[1])
+                has_rawhtml = has_rawhtml or item[0] == 'raw'
+            else:
+                if pieces:
+                    items.append((''.join(pieces), has_rawhtml))
+                    pieces = []
+                    has_rawhtml = False
+                items.append(item)
+            pos = element_end
+
+        if pos < end:
+            pieces.append(text[pos:end])
+        if pieces:
+            items.append((''.join(pieces), has_rawhtml))
+
+        return items
+
+    def make_autolink(self, text, matched):
+        url = group(text, matched, 2)
+        return nodes.reference('', url, refuri=url)
+
+    def make_automail(self, text, matched):
+        email = group(text, matched, 2)
+        if email.startswith('mailto:'):
+            email = email[7:]
+        return nodes.reference('', email, refuri='mailto:' + email)
+
+    def make_linebreak(self, text, matched):
+        raise RuntimeError('Unknown element: br')
+
+    def make_rawhtml(self, text, matched):
+        return ('raw', group(text, matched, 2))
+
+    def make_entity(self, text, matched):
+        return ('text', group(text, matched, 2))
+
+    def make_link(self, text, matched):
+        node = self.fill(nodes.reference(), group(text, matched, 2))
+        href = group(text, matched, 9)
+        if href:
+            if href[0] == '<':
+                href = href[1:-1]
+            href = unescape(href.strip())
+            if href:
+                node['refuri'] = href
+
+        title = group(text, matched, 13)
+        if title:
+            node['reftitle'] = dequote(unescape(title))
+        return node
+
+    def make_image(self, text, matched):
+        node = nodes.image()
+        alt = make_alt(group(text, matched, 2))
+        if alt:
+            node['alt'] = alt
+
+        src = group(text, matched, 9).split()
+        if src:
+            if src[0][0] == '<' and src[0][-1] == '>':
+                src[0] = src[0][1:-1]
+            if src[0]:
+                node['uri'] = unescape(src[0])
+        if len(src) > 1:
+            # FIXME: Sphinx does not process reftitle attribute
+            node['reftitle'] = dequote(unescape(' '.join(src[1:])))
+        return node
+
+    def make_image_reference(self, text, matched):
+        return self.make_reference(text, matched, nodes.image)
+
+    def make_reference(self, text, matched, cls=nodes.reference):
+        if matched.re.groups >= 9 and matched.group(9):
+            refid = group(text, matched, 9).lower()
+        else:
+            refid = group(text, matched, 2).lower()
+
+        refid = NEWLINE_CLEANUP_RE.sub(' ', refid)
+        if refid not in self.references:
+            return None
+
+        href, title = self.references[refid]
+        if cls is nodes.image:
+            node = nodes.image()
+            alt = make_alt(group(text, matched, 2))
+            if alt:
+                node['alt'] = alt
+            if href:
+                node['uri'] = href
+        else:
+            node = self.fill(nodes.reference(), group(text, matched, 2))
+            if href:
+                node['refuri'] = href
+        if title:
+            node['reftitle'] = title
+        return node
+
+
+def group(text, matched, number):
+    """Return the original text of a group matched against the masked text."""
+    start, end = matched.span(number)
+    if start < 0:
+        return None
+    else:
+        return text[start:end]
+
+
+def make_alt(text):
+    return unescape(inlinepatterns.ATTR_RE.sub('', text))
+
+
+def normalize(text):
+    """Normalize whitespace of *text* like Python-Markdown."""
+    text = text.replace('\x02', '').replace('\x03', '')
+    text = text.replace('\r\n', '\n').replace('\r', '\n') + '\n\n'
+    text = text.expandtabs(TAB_LENGTH)
+    return re.sub(r'(?<=\n) +\n', '\n', text)
+
+
+def collect_references(lines, references):
+    """Remove reference definitions from *lines*, storing them to *references*."""
+    new_lines = []
+    lines.reverse()
+    while lines:
+        line = lines.pop()
+        matched = ReferencePreprocessor.RE.match(line)
+        if matched:
+            refid = matched.group(1).strip().lower()
+            link = matched.group(2).lstrip('<').rstrip('>')
+            title = matched.group(5) or matched.group(6) or matched.group(7)
+            if not title and lines:
+                title_matched = ReferencePreprocessor.TITLE_RE.match(lines[-1])
+                if title_matched:
+                    lines.pop()
+                    title = title_matched.group(2) or title_matched.group(3) or title_matched.group(4)
+            references[refid] = (link, title)
+            new_lines.append('')
+        else:
+            new_lines.append(line)
+
+    return new_lines
+
+
+def get_left_tag(block):
+    """Return the name of the start tag of *block* and its length."""
+    matched = LEFT_TAG_RE.match(block)
+    if matched:
+        return matched.group('tag'), len(matched.group(0))
+    else:
+        tag = block[1:].split('>', 1)[0].lower()
+        return tag, len(tag) + 2
+
+
+def find_right_tag(left_tag, right_tag, start, block):
+    """Return the offset next to *right_tag* closing the tag; -1 if not found.
+
+    The tags of the same name nested in *block* are skipped.
+    """
+    depth = 0
+    while True:
+        i = block.find(right_tag, start)
+        if i == -1:
+            return -1
+
+        j = block.find(left_tag, start)
+        if j > i or j == -1:
+            if depth == 0:
+                return i + len(right_tag)
+            depth -= 1
+            start = i + len(right_tag)
+        else:
+            depth += 1
+            start = block.find('>', j) + 1
+
+
+def get_right_tag(left_tag, left_index, block):
+    """Return the name of the end tag of *block* and the offset next to it."""
+    for pattern in RIGHT_TAG_PATTERNS:
+        tag = pattern % left_tag
+        index = find_right_tag('<' + left_tag, tag, left_index, block)
+        if index > 2:
+            return tag.lstrip('<').rstrip('>'), index
+
+    return block.rstrip()[-left_index:-1].lower(), len(block)
+
+
+def equal_tags(left_tag, right_tag):
+    if left_tag[0] in '?@%':  # PHP, etc.
+        return True
+    else:
+        return right_tag == '/' + left_tag or right_tag == left_tag == '--'
+
+
+def split_html_blocks(text):
+    """Split *text* into blocks, separating blocks of raw HTML as :class:`RawHtml`.
+
+    The blocks are split from the end like Python-Markdown; the odd newline
+    of blank lines is kept at the end of the preceding block.
+    """
+    blocks = text.rsplit('\n\n')
+    result = []
+    items = None
+    while blocks:
+        block = blocks.pop(0)
+        if block.startswith('\n'):  # the leading newline of the text
+            block = block[1:]
+
+        if items is None:
+            if not block.startswith('<') or len(block.strip()) <= 1:
+                result.append(block)
+                continue
+
+            if block[1:4] == '!--':
+                left_tag, left_index = '--', 2
+            else:
+                left_tag, left_index = get_left_tag(block)
+            right_tag, data_index = get_right_tag(left_tag, left_index, block)
+            is_block_level = isBlockLevel(left_tag) or left_tag == '--'
+            if data_index < len(block) and is_block_level:
+                blocks.insert(0, block[data_index:])
+                block = block[:data_index]
+
+            if not (isBlockLevel(left_tag) or block[1] in '!?@%'):
+                result.append(block)
+            elif left_tag in ('hr', 'hr/'):
+                result.append(block.strip())
+            elif block.rstrip().endswith('>') and equal_tags(left_tag, right_tag):
+                result.append(RawHtml(block.strip()))
+            elif is_block_level:
+                items = [block.strip()]
+            else:
+                result.append(RawHtml(block.strip()))
+        else:
+            items.append(block)
+            right_tag, data_index = get_right_tag(left_tag, left_index, ''.join(items))
+            data_index -= sum(len(item) for item in items[:-1])
+            if equal_tags(left_tag, right_tag):
+                if data_index < len(block):
+                    items[-1] = block[:data_index]
+                    blocks.insert(0, block[data_index:])
+                result.append(RawHtml('\n\n'.join(items)))
+                items = None
+
+    if items:
+        result.append(RawHtml('\n\n'.join(items)))
+
+    return result
+
+
+def append_child(parent, node):
+    """Append *node* to *parent* without setting the parent of *node*.
+
+    docutils looks for the document through the parents on each append, so
+    appending a node to a deep tree walks up to the root (recursively).  The
+    parents are set by :func:`set_parents` after parsing.
+    """
+    parent.children.append(node)
+
+
+def set_parents(root):
+    """Set the parents of all nodes under *root*."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            child.parent = node
+            if isinstance(child, nodes.Element):
+                stack.append(child)
+
+
+class BlockParser(object):
+    """Parse blocks into docutils nodes like the BlockParser of Python-Markdown.
+
+    The inline text of paragraphs, titles and list items is kept aside, and
+    is parsed by :meth:`finish` after all blocks are parsed.
+
+    The processors of nested blocks (ex. quotes) are generators; they yield
+    the parent and the blocks to parse into it, and are resumed after that.
+    :meth:`parse_blocks` drives them with an explicit stack instead of
+    recursion, so deeply nested quotes and lists are parsed as well.
+    """
+
+    def __init__(self, inline_parser, sections=None, fenced_code_blocks=None):
+        self.inline_parser = inline_parser
+        self.sections = sections
+        self.fenced_code_blocks = fenced_code_blocks or []
+        self.state = []
+        self.quotes = set()
+        self.codes = {}
+        self.texts = {}
+        self.tails = {}
+        self.pending = []
+        self.pending_ids = set()
+        self.processors = [
+            (self.test_fenced_code, self.run_fenced_code),
+            (self.test_rawhtml, self.run_rawhtml),
+            (self.test_empty, self.run_empty),
+            (self.test_list_indent, self.run_list_indent),
+            (self.test_code, self.run_code),
+            (self.test_hash_header, self.run_hash_header),
+            (self.test_setext_header, self.run_setext_header),
+            (self.test_hr, self.run_hr),
+            (self.test_olist, self.run_olist),
+            (self.test_ulist, self.run_ulist),
+            (self.test_quote, self.run_quote),
+            (lambda parent, block: True, self.run_paragraph),
+        ]
+
+    def parse_blocks(self, parent, blocks):
+        stack = [(parent, blocks)]  # pairs of a parent and its blocks, and the processors suspended
+        while stack:
+            top = stack[-1]
+            if isinstance(top, tuple):
+                parent, blocks = top
+                if not blocks:
+                    stack.pop()
+                    continue
+
+                check_time_budget()
+                for test, run in self.processors:
+                    if test(parent, blocks[0]):
+                        nested = run(parent, blocks)
+                        if nested is not None:
+                            stack.append(nested)
+                        break
+            else:
+                try:
+                    stack.append(next(top))
+                except StopIteration:
+                    stack.pop()
+
+    def finish(self):
+        """Parse the inline text kept aside and fill the nodes."""
+        for node, code in self.codes.values():
+            node += nodes.Text(code.rstrip() + '\n')
+
+        # the innermost nodes first; their parents are not set until their parents are filled
+        for node in reversed(self.pending):
+            check_time_budget()
+            blocks = node.children[:]
+            del node[:]
+
+            text, children = None, []
+            source = self.texts.get(id(node))
+            if source and (source.strip() or not blocks):
+                text, children = split_items(self.inline_parser.parse(source))
+
+            for block in blocks:
+                children.append((block, None))
+                tail = self.tails.get(id(block))
+                if tail and tail.strip():
+                    tail, tail_children = split_items(self.inline_parser.parse(tail))
+                    children[-1] = (block, tail)
+                    children.extend(tail_children)
+
+            fill_node(node, text, children)
+
+    def add_pending(self, node):
+        if id(node) not in self.pending_ids:
+            self.pending_ids.add(id(node))
+            self.pending.append(node)
+
+    def add_text(self, node, text):
+        self.add_pending(node)
+        self.texts[id(node)] = text
+
+    def last_child(self, parent):
+        if len(parent):
+            return parent[-1]
+        else:
+            return None
+
+    def is_code(self, node):
+        return id(node) in self.codes
+
+    def is_list(self, node):
+        return isinstance(node, (nodes.bullet_list, nodes.enumerated_list))
+
+    def is_item(self, node):
+        return isinstance(node, nodes.list_item)
+
+    def make_item(self, parent):
+        item = nodes.list_item()
+        append_child(parent, item)
+        self.add_pending(item)
+        return item
+
+    def move_text_to_paragraph(self, item):
+        text = self.texts.pop(id(item), None)
+        if text:
+            paragraph = nodes.paragraph()
+            self.add_text(paragraph, text)
+            item.children.insert(0, paragraph)
+
+    def test_fenced_code(self, parent, block):
+        return FENCED_CODE_PLACEHOLDER_RE.match(block) is not None
+
+    def run_fenced_code(self, parent, blocks):
+        index = FENCED_CODE_PLACEHOLDER_RE.match(blocks.pop(0)).group(1)
+        code, language, _ = self.fenced_code_blocks[int(index)]
+        append_child(parent, make_code_block(code, language))
+
+    def test_rawhtml(self, parent, block):
+        return isinstance(block, RawHtml)
+
+    def run_rawhtml(self, parent, blocks):
+        html = blocks.pop(0)
+        if '\x1f' in html:  # having fenced code blocks
+            html = restore_fenced_code(html, self.fenced_code_blocks)
+        append_child(parent, nodes.paragraph('', '', nodes.raw(format='html', text=html)))
+
+    def test_empty(self, parent, block):
+        return not block or block.startswith('\n')
+
+    def run_empty(self, parent, blocks):
+        block = blocks.pop(0)
+        filler = '\n\n'
+        if block:
+            filler = '\n'
+            rest = block[1:]
+            if rest:
+                blocks.insert(0, rest)
+
+        sibling = self.last_child(parent)
+        if sibling is not None and self.is_code(sibling):
+            self.codes[id(sibling)][1] += filler
+
+    def test_list_indent(self, parent, block):
+        return (block.startswith(' ' * TAB_LENGTH) and
+                'detabbed' not in self.state[-1:] and
+                (self.is_item(parent) or (len(parent) and self.is_list(parent[-1]))))
+
+    def run_list_indent(self, parent, blocks):
+        block = blocks.pop(0)
+        level, sibling = self.get_level(parent, block)
+        block = self.loose_detab(block, level)
+
+        self.state.append('detabbed')
+        if self.is_item(parent):
+            if len(parent) and self.is_list(parent[-1]):
+                yield parent[-1], [block]
+            else:
+                yield parent, [block]
+        elif self.is_item(sibling):
+            yield sibling, [block]
+        elif len(sibling) and self.is_item(sibling[-1]):
+            self.move_text_to_paragraph(sibling[-1])
+            yield sibling[-1], block.split('\n\n')
+        else:
+            yield self.make_item(sibling), [block]
+        self.state.pop()
+
+    def get_level(self, parent, block):
+        matched = INDENT_RE.match(block)
+        if matched:
+            indent_level = len(matched.group(1)) // TAB_LENGTH
+        else:
+            indent_level = 0
+
+        if self.state[-1:] == ['list']:
+            level = 1
+        else:
+            level = 0
+
+        while indent_level > level:
+            child = self.last_child(parent)
+            if child is not None and (self.is_list(child) or self.is_item(child)):
+                if self.is_list(child):
+                    level += 1
+                parent = child
+            else:
+                break
+
+        return level, parent
+
+    def loose_detab(self, text, level=1):
+        indent = ' ' * TAB_LENGTH * level
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            if line.startswith(indent):
+                lines[i] = line[len(indent):]
+        return '\n'.join(lines)
+
+    def detab(self, text):
+        indent = ' ' * TAB_LENGTH
+        new_lines = []
+        lines = text.split('\n')
+        for line in lines:
+            if line.startswith(indent):
+                new_lines.append(line[TAB_LENGTH:])
+            elif not line.strip():
+                new_lines.append('')
+            else:
+                break
+        return '\n'.join(new_lines), '\n'.join(lines[len(new_lines):])
+
+    def test_code(self, parent, block):
+        return block.startswith(' ' * TAB_LENGTH)
+
+    def run_code(self, parent, blocks):
+        sibling = self.last_child(parent)
+        block, rest = self.detab(blocks.pop(0))
+        if sibling is not None and self.is_code(sibling):
+            code = self.codes[id(sibling)]
+            code[1] = '%s\n%s\n' % (code[1], block.rstrip())
+        else:
+            literal_block = nodes.literal_block()
+            append_child(parent, literal_block)
+            self.codes[id(literal_block)] = [literal_block, block.rstrip() + '\n']
+
+        if rest:
+            blocks.insert(0, rest)
+
+    def test_hash_header(self, parent, block):
+        return bool(HASH_HEADER_RE.search(block))
+
+    def run_hash_header(self, parent, blocks):
+        block = blocks.pop(0)
+        matched = HASH_HEADER_RE.search(block)
+        before = block[:matched.start()]
+        after = block[matched.end():]
+        if before:
+            yield parent, [before]
+        self.make_section(parent, len(matched.group('level')), matched.group('header').strip())
+        if after:
+            blocks.insert(0, after)
+
+    def test_setext_header(self, parent, block):
+        return bool(SETEXT_HEADER_RE.match(block))
+
+    def run_setext_header(self, parent, blocks):
+        lines = blocks.pop(0).split('\n')
+        if lines[1].startswith('='):
+            level = 1
+        else:
+            level = 2
+        self.make_section(parent, level, lines[0].strip())
+        if len(lines) > 2:
+            blocks.insert(0, '\n'.join(lines[2:]))
+
+    def make_section(self, parent, level, text):
+        section = nodes.section(level=level)
+        title = nodes.title()
+        section += title
+        append_child(parent, section)
+        if text:
+            self.add_text(title, text)
+        if self.sections is not None:
+            self.sections.append(section)
+
+    def test_hr(self, parent, block):
+        matched = HR_RE.search(block)
+        return bool(matched and (matched.end() == len(block) or block[matched.end()] == '\n'))
+
+    def run_hr(self, parent, blocks):
+        raise RuntimeError('Unknown element: hr')
+
+    def test_olist(self, parent, block):
+        return bool(OLIST_RE.match(block))
+
+    def run_olist(self, parent, blocks):
+        return self.run_list(parent, blocks, nodes.enumerated_list)
+
+    def test_ulist(self, parent, block):
+        return bool(ULIST_RE.match(block))
+
+    def run_ulist(self, parent, blocks):
+        return self.run_list(parent, blocks, nodes.bullet_list)
+
+    def run_list(self, parent, blocks, cls):
+        items = self.get_items(blocks.pop(0))
+        sibling = self.last_child(parent)
+        if sibling is not None and self.is_list(sibling):
+            lst = sibling
+            self.move_text_to_paragraph(lst[-1])
+
+            last = self.last_child(lst[-1])
+            if last is not None and self.tails.get(id(last)):
+                paragraph = nodes.paragraph()
+                self.add_text(paragraph, self.tails.pop(id(last)).lstrip())
+                append_child(lst[-1], paragraph)
+
+            item = self.make_item(lst)
+            self.state.append('looselist')
+            yield item, [items.pop(0)]
+            self.state.pop()
+        elif self.is_list(parent):
+            lst = parent
+        else:
+            lst = cls()
+            append_child(parent, lst)
+
+        self.state.append('list')
+        for item in items:
+            if item.startswith(' ' * TAB_LENGTH):
+                yield lst[-1], [item]
+            else:
+                yield self.make_item(lst), [item]
+        self.state.pop()
+
+    def get_items(self, block):
+        items = []
+        for line in block.split('\n'):
+            matched = LIST_CHILD_RE.match(line)
+            if matched:
+                items.append(matched.group(3))
+            elif LIST_INDENT_RE.match(line):
+                if items[-1].startswith(' ' * TAB_LENGTH):
+                    items[-1] = '%s\n%s' % (items[-1], line)
+                else:
+                    items.append(line)
+            else:
+                items[-1] = '%s\n%s' % (items[-1], line)
+        return items
+
+    def test_quote(self, parent, block):
+        return bool(QUOTE_RE.search(block))
+
+    def run_quote(self, parent, blocks):
+        block = blocks.pop(0)
+        matched = QUOTE_RE.search(block)
+        yield parent, [block[:matched.start()]]
+        block = '\n'.join(self.clean_quote(line) for line in block[matched.start():].split('\n'))
+
+        sibling = self.last_child(parent)
+        if sibling is not None and id(sibling) in self.quotes:
+            quote = sibling
+        else:
+            quote = nodes.literal_block()
+            append_child(parent, quote)
+            self.quotes.add(id(quote))
+
+        self.state.append('blockquote')
+        yield quote, block.split('\n\n')
+        self.state.pop()
+
+    def clean_quote(self, line):
+        matched = QUOTE_RE.match(line)
+        if line.strip() == '>':
+            return ''
+        elif matched:
+            return matched.group(2)
+        else:
+            return line
+
+    def run_paragraph(self, parent, blocks):
+        block = blocks.pop(0)
+        if not block.strip():
+            return
+
+        if self.state[-1:] == ['list']:
+            sibling = self.last_child(parent)
+            if sibling is not None:
+                tail = self.tails.get(id(sibling))
+                if tail:
+                    self.tails[id(sibling)] = '%s\n%s' % (tail, block)
+                else:
+                    self.tails[id(sibling)] = '\n%s' % block
+            else:
+                text = self.texts.get(id(parent))
+                if text:
+                    self.add_text(parent, '%s\n%s' % (text, block))
+                else:
+                    self.add_text(parent, block.lstrip())
+        else:
+            paragraph = nodes.paragraph()
+            append_child(parent, paragraph)
+            self.add_text(paragraph, block.lstrip())
+
+
+def split_blocks(text, references):
+    """Split *text* into blocks; raw HTML blocks are split out first.
+
+    Reference definitions are removed after that, and the rest of blocks are
+    split again like Python-Markdown, which joins and splits them again.
+    """
+    blocks = []
+    run = []
+    for block in split_html_blocks(text) + [None]:
+        if isinstance(block, RawHtml) or block is None:
+            if run:
+                lines = collect_references('\n\n'.join(run).split('\n'), references)
+                if block is None:
+                    blocks.extend('\n'.join(lines).split('\n\n'))
+                else:
+                    pieces = ('\n'.join(lines) + '\n\n').split('\n\n')
+                    rest = pieces.pop()  # the leading newline of the next block
+                    blocks.extend(pieces)
+                    if rest:
+                        blocks.append(rest)
+                run = []
+            if block is not None:
+                blocks.append(block)
+        else:
+            run.append(block)
+
+    return blocks
+
+
+def parse(text, references, sections=None):
+    """Parse *text* into a container of flat (not nested) docutils nodes."""
+    text, fenced_code_blocks = extract_fenced_code(text)
+    blocks = split_blocks(normalize(text), references)
+    parser = BlockParser(InlineParser(references), sections, fenced_code_blocks)
+    root = nodes.container()
+    parser.parse_blocks(root, blocks)
+    parser.finish()
+    set_parents(root)
+    return root
+
+
+def convert(text, sections=None):
+    """Convert *text* to a container of docutils nodes directly.
+
+    Returns an empty string if *text* is blank, like :func:`md2node`.  If
+    *sections* is given, the sections created are appended to it in
+    document order.
+    """
+    if not text.strip():
+        return ''
+
+    root = parse(text, {}, sections)
+    children = root.children[:]
+    del root[:]
+    root.extend(nest_sections(children))
+    return root
+
+
+def convert_block(text, references):
+    """Convert a block of *text* using *references* without nesting sections."""
+    return parse(text, dict(references)).children
+
+
+def convert_with_timings(text, timings, sections=None):
+    """Convert *text* directly, recording the elapsed time to *timings*."""
+    started = clock()
+    top_level_nodes = list(iter_md2node(text, sections))
+    timings['convert'] = clock() - started
+    return top_level_nodes
+
+
+def md2node(text):
+    return convert(text)
+
+
+def iter_md2node(text, sections=None):
+    """Convert *text* directly, yielding the top-level nodes."""
+    root = convert(text, sections)
+    if root:
+        children = root.children[:]
+        del root[:]
+        for node in children:
+            yield node
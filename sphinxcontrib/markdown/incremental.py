@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.incremental
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Incremental conversion of Markdown documents.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import re
+from docutils import nodes
+from sphinxcontrib.markdown import (
+    create_markdown, get_backend, md2node, engine_pool, MarkdownEnginePool, RecursionError, SectionPostprocessor
+)
+
+# Lines which may continue the previous block even after a blank line:
+# indented lines, list items, blockquotes and reference definitions (they
+# are removed before block parsing).
+CONTINUATION_RE = re.compile(r'[\s*+\->]|\d+\.|\[[^\]]*\]:')
+FENCE_RE = re.compile(r'`{3,}|~{3,}')
+
+
+def create_block_markdown():
+    """Create a Markdown engine which does not nest sections."""
+    md = create_markdown()
+    del md.postprocessors['section']
+    return md
+
+
+block_engine_pool = MarkdownEnginePool(create_block_markdown)
+
+
+def split_blocks(text):
+    """Split Markdown *text* into the blocks converted independently.
+
+    A new block starts at a non-indented line following a blank line, unless
+    the line is able to continue the previous block.  Fenced code blocks are
+    not split even if they have blank lines.  Documents having HTML blocks
+    are not split at all, because an HTML block can span blank lines.
+    """
+    blocks = []
+    lines = []
+    blank = True
+    empty = True  # no contents in current block yet
+    fence = None  # the fence of the code block being read
+    for line in text.split('\n'):
+        if fence:
+            if line.rstrip(' ') == fence:
+                fence = None
+            lines.append(line)
+            continue
+        elif blank and line.startswith('<'):
+            return [text]  # HTML block
+        elif blank and not empty and line.strip() and not CONTINUATION_RE.match(line):
+            blocks.append('\n'.join(lines))
+            lines = []
+
+        lines.append(line)
+        blank = not line.strip()
+        empty = empty and blank
+        matched = FENCE_RE.match(line)
+        if matched:
+            fence = matched.group(0)
+
+    blocks.append('\n'.join(lines))
+    return blocks
+
+
+def collect_references(text):
+    """Collect the link references defined in *text*."""
+    with engine_pool.engine() as md:
+        lines = text.split('\n')
+        for preprocessor in md.preprocessors.values():
+            lines = preprocessor.run(lines)
+
+        return dict(md.references)
+
+
+def convert_block(text, references):
+    with block_engine_pool.engine() as md:
+        md.references.update(references)
+        try:
+            return md.convert(text).children
+        except RecursionError:
+            pass  # nested too deeply for the block parser of Python-Markdown
+
+    return get_backend('direct').convert_block(text, references)
+
+
+class IncrementalConverter(object):
+    """Convert a Markdown document, reusing the results of unchanged blocks.
+
+    The converter remembers the blocks of the last converted document.  On
+    the next conversion, only the blocks changed since then are converted
+    again; sections are nested after the blocks are joined.  Optionally,
+    converted blocks are also stored to *cache* (e.g.
+    :class:`~sphinxcontrib.markdown.cache.ParseCache`).  If *fragments* (a
+    :class:`~sphinxcontrib.markdown.cache.FragmentCache`) is given, blocks
+    are shared with the other documents through it.  The blocks are
+    converted by the conversion backend named *backend*.
+
+    If *reuse_blocks* is false, the blocks are not remembered; such a
+    converter is used only once, and the converted nodes are returned
+    without copying.
+    """
+
+    def __init__(self, cache=None, backend='markdown', fragments=None, reuse_blocks=True):
+        self.cache = cache
+        self.backend = backend
+        self.fragments = fragments
+        self.reuse_blocks = reuse_blocks
+        self.blocks = {}
+
+    def convert(self, text):
+        if not text.strip():
+            return md2node(text)
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        backend = get_backend(self.backend)
+        references = collect_references(text)
+        refkey = repr(sorted(references.items()))
+
+        blocks = {}
+        container = nodes.container()
+        for block in split_blocks(text):
+            if '[' in block:
+                key = u'block\0%s\0%s' % (refkey, block)
+            else:
+                key = u'block\0\0%s' % block  # references are not used in the block
+            subnodes = self.blocks.get(key)
+            if subnodes is None:
+                subnodes = self.convert_block(backend, key, block, references)
+
+            if self.reuse_blocks:
+                blocks[key] = subnodes
+                container.extend(node.deepcopy() for node in subnodes)
+            else:
+                container.extend(subnodes)
+
+        self.blocks = blocks
+        return SectionPostprocessor().run(container)
+
+    def convert_block(self, backend, key, block, references):
+        """Convert *block*, or load it from the caches."""
+        if self.fragments is not None:
+            subnodes = self.fragments.get((self.backend, key))
+            if subnodes is not None:
+                return subnodes
+
+        subnodes = None
+        if self.cache:
+            subnodes = self.cache.get(key)
+        if subnodes is None:
+            subnodes = backend.convert_block(block, references)
+            if self.cache:
+                self.cache.set(key, subnodes)
+
+        if self.fragments is not None:
+            if self.reuse_blocks:
+                self.fragments.set((self.backend, key), subnodes)
+            else:  # *subnodes* will be inserted to the document
+                self.fragments.set((self.backend, key), [node.deepcopy() for node in subnodes])
+        return subnodes
@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.inline
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Linear-time parsing of emphasis, strong emphasis and code spans.
+
+    The inline patterns of Python-Markdown are regular expressions applied to
+    the whole text over and over; unpaired asterisks, underscores or
+    backquotes make them quadratic or worse.  The texts having too many
+    unpaired delimiters (or too many delimiters at all) are parsed with a
+    delimiter stack in a single pass instead.  Only emphasis, strong
+    emphasis, code spans and backslash escapes are recognized in such texts;
+    the other markups (ex. links) are kept as text.  Such texts are recorded
+    by :func:`record_fallbacks` to warn about them.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import re
+import threading
+from contextlib import contextmanager
+from docutils import nodes
+from markdown import treeprocessors
+from markdown.util import AtomicString, etree
+from sphinxcontrib.markdown import check_time_budget, fill_node
+
+#: The texts having more delimiters than this are parsed by :func:`parse`
+MAX_DELIMITERS = 5000
+
+#: The texts having more unpaired delimiters than this are parsed by :func:`parse`
+MAX_UNPAIRED_DELIMITERS = 1000
+
+ESCAPED_CHARS = frozenset('\\`*_{}[]()>#+-.!')
+BACKTICKS_RE = re.compile(r'`+')
+TOKEN_RE = re.compile(r'\\.|\*+|_+', re.DOTALL)
+WORD_RE = re.compile(r'\w', re.UNICODE)
+try:
+    str_types = (str, unicode)  # NOQA
+except NameError:  # Python 3
+    str_types = (str,)
+
+PLACEHOLDER_TAG = 'pathological-text'
+TAGS = {
+    nodes.emphasis: 'em',
+    nodes.strong: 'strong',
+    nodes.literal: 'code',
+}
+
+
+fallbacks = threading.local()
+
+
+def is_pathological(text):
+    """Return True if *text* has too many delimiters for the patterns of Python-Markdown.
+
+    The patterns take quadratic time for the delimiters, and worse for the
+    unpaired ones.  The delimiters are paired only if there are many.
+    """
+    count = text.count('*') + text.count('_') + text.count('`')
+    if count > MAX_DELIMITERS:
+        return True
+    elif count <= MAX_UNPAIRED_DELIMITERS:
+        return False
+    else:
+        parser = DelimiterParser()
+        parser.feed(text)
+        return parser.unpaired > MAX_UNPAIRED_DELIMITERS
+
+
+@contextmanager
+def record_fallbacks():
+    """Record the texts parsed by :func:`parse` instead of the patterns in the block.
+
+    Yields a list which gets the texts given to :func:`note_fallback`.
+    """
+    outer = getattr(fallbacks, 'texts', None)
+    fallbacks.texts = texts = []
+    try:
+        yield texts
+    finally:
+        fallbacks.texts = outer
+        if outer is not None:
+            outer.extend(texts)
+
+
+def note_fallback(text):
+    """Record *text* parsed by :func:`parse` if recorded by :func:`record_fallbacks`."""
+    texts = getattr(fallbacks, 'texts', None)
+    if texts is not None:
+        texts.append(text)
+
+
+def find_code_spans(text):
+    """Return the code spans in *text* as tuples of the start, the end and the code.
+
+    A run of backquotes is closed by the next run of the same length.  The
+    runs are indexed by their length, and the candidates of closers are
+    never looked at twice.
+    """
+    runs = [matched.span() for matched in BACKTICKS_RE.finditer(text)]
+    closers = {}  # length -> indices of the runs
+    for index, (start, end) in enumerate(runs):
+        closers.setdefault(end - start, []).append(index)
+    positions = dict.fromkeys(closers, 0)  # length -> the next candidate in closers
+
+    spans = []
+    pos = 0
+    for index, (start, end) in enumerate(runs):
+        if start < pos or text[start - 1:start] == '\\':
+            continue  # in a code span, or escaped
+
+        candidates = closers[end - start]
+        i = positions[end - start]
+        while i < len(candidates) and candidates[i] <= index:
+            i += 1
+        if i < len(candidates):
+            closer = runs[candidates[i]]
+            spans.append((start, closer[1], text[end:closer[0]].strip()))
+            pos = closer[1]
+            i += 1
+        positions[end - start] = i
+
+    return spans
+
+
+class Item(object):
+    """An item of the doubly linked list of inline contents.
+
+    An item is a text (*cls* is None), a run of delimiters (*char* is set),
+    a code span (*cls* is ``nodes.literal``) or an emphasis having the
+    items from *first* to *last*.
+    """
+
+    __slots__ = ('cls', 'text', 'char', 'count', 'can_open', 'can_close', 'first', 'last', 'prev', 'next')
+
+    def __init__(self, cls=None, text=None, char=None, count=0, can_open=False, can_close=False):
+        self.cls = cls
+        self.text = text
+        self.char = char
+        self.count = count
+        self.can_open = can_open
+        self.can_close = can_close
+        self.first = self.last = self.prev = self.next = None
+
+
+class DelimiterParser(object):
+    """Parse emphasis, strong emphasis and code spans with a delimiter stack.
+
+    A run of delimiters opens emphasis if it is followed by a non-space
+    character, and closes emphasis if it is preceded by one.  Like the smart
+    emphasis of Python-Markdown, a single ``_`` inside a word neither opens
+    nor closes emphasis.  A closer is paired with the nearest opener of the
+    same character; the delimiters between them are left as text.
+    """
+
+    def __init__(self):
+        self.head = self.tail = None
+        self.unpaired = 0  # the number of delimiters not paired
+
+    def parse(self, text):
+        self.feed(text)
+        return collect(self.head)
+
+    def feed(self, text):
+        """Split *text* into items and pair the delimiters."""
+        pos = 0
+        for start, end, code in find_code_spans(text) + [(len(text), len(text), None)]:
+            self.tokenize(text, pos, start)
+            self.unpaired += text.count('`', pos, start)  # not in code spans
+            if code is not None:
+                self.append(Item(nodes.literal, code))
+            pos = end
+
+        self.process_emphasis()
+
+    def append(self, item):
+        if self.tail is None:
+            self.head = item
+        else:
+            self.tail.next = item
+            item.prev = self.tail
+        self.tail = item
+
+    def append_text(self, text):
+        if self.tail is not None and self.tail.cls is None and self.tail.char is None:
+            self.tail.text += text
+        else:
+            self.append(Item(text=text))
+
+    def unlink(self, item):
+        if item.prev is None:
+            self.head = item.next
+        else:
+            item.prev.next = item.next
+        if item.next is None:
+            self.tail = item.prev
+        else:
+            item.next.prev = item.prev
+
+    def tokenize(self, text, start, end):
+        """Split the text between *start* and *end* into texts and runs of delimiters."""
+        pos = start
+        for matched in TOKEN_RE.finditer(text, start, end):
+            if pos < matched.start():
+                self.append_text(text[pos:matched.start()])
+            pos = matched.end()
+
+            token = matched.group()
+            if token[0] == '\\':
+                if token[1] in ESCAPED_CHARS:
+                    self.append_text(token[1])
+                else:
+                    self.append_text(token)
+                continue
+
+            before = text[matched.start() - 1:matched.start()]
+            after = text[pos:pos + 1]
+            can_open = after != '' and not after.isspace()
+            can_close = before != '' and not before.isspace()
+            if token == '_':
+                can_open = can_open and not WORD_RE.match(before)
+                can_close = can_close and not WORD_RE.match(after)
+
+            if can_open or can_close:
+                self.append(Item(char=token[0], count=len(token), can_open=can_open, can_close=can_close))
+                self.unpaired += len(token)
+            else:
+                self.append_text(token)
+
+        if pos < end:
+            self.append_text(text[pos:end])
+
+    def process_emphasis(self):
+        stack = []  # the openers
+        bottoms = {'*': 0, '_': 0}  # no openers of the char below these in the stack
+        item = self.head
+        while item is not None:
+            following = item.next
+            if item.char is not None:
+                if item.can_close:
+                    self.close(item, stack, bottoms)
+                if item.count and item.can_open:
+                    stack.append(item)
+            item = following
+
+    def close(self, closer, stack, bottoms):
+        while closer.count:
+            check_time_budget()
+            index = len(stack) - 1
+            while index >= bottoms[closer.char] and stack[index].char != closer.char:
+                index -= 1
+            if index < bottoms[closer.char]:
+                bottoms[closer.char] = len(stack)
+                return
+
+            opener = stack[index]
+            del stack[index + 1:]  # the delimiters between them are kept as text
+            if opener.count >= 3 and closer.count >= 3:
+                used = 1  # strong emphasis around emphasis, like Python-Markdown
+            elif opener.count >= 2 and closer.count >= 2:
+                used = 2
+            else:
+                used = 1
+
+            self.wrap(opener, closer, nodes.strong if used == 2 else nodes.emphasis)
+            opener.count -= used
+            closer.count -= used
+            self.unpaired -= used * 2
+            if opener.count == 0:
+                self.unlink(opener)
+                stack.pop()
+            if closer.count == 0:
+                self.unlink(closer)
+            for char in bottoms:
+                bottoms[char] = min(bottoms[char], len(stack))
+
+    def wrap(self, opener, closer, cls):
+        """Move the items between *opener* and *closer* into a new item of *cls*."""
+        item = Item(cls)
+        if opener.next is not closer:
+            item.first = opener.next
+            item.last = closer.prev
+            item.first.prev = item.last.next = None
+        opener.next = closer.prev = item
+        item.prev = opener
+        item.next = closer
+
+
+def collect(item):
+    """Convert the linked list of items from *item* to a list of contents."""
+    results = []
+    stack = []
+    contents = results
+    while True:
+        while item is not None:
+            if item.cls is None:
+                if item.char is None:
+                    text = item.text
+                else:
+                    text = item.char * item.count  # not paired
+                if contents and not isinstance(contents[-1], tuple):
+                    contents[-1] += text
+                else:
+                    contents.append(text)
+            elif item.cls is nodes.literal:
+                contents.append((item.cls, item.text))
+            else:
+                children = []
+                contents.append((item.cls, children))
+                stack.append((item.next, contents))
+                item = item.first
+                contents = children
+                continue
+            item = item.next
+
+        if not stack:
+            return results
+        item, contents = stack.pop()
+
+
+def parse(text):
+    """Parse *text* into a list of inline contents in linear time.
+
+    Each content is a text, or a pair of the class of the node (emphasis,
+    strong or literal) and its contents; the content of a literal is the
+    text of the code span.
+    """
+    return DelimiterParser().parse(text)
+
+
+def split_contents(contents):
+    """Split *contents* into the leading text and the pairs of a child and its tail."""
+    text = None
+    children = []
+    for content in contents:
+        if isinstance(content, tuple):
+            children.append([content, None])
+        elif children:
+            children[-1][1] = content
+        else:
+            text = content
+
+    return text, children
+
+
+def make_items(text):
+    """Parse *text* into a list of docutils nodes and pairs of a text and a raw HTML flag.
+
+    The nodes are filled in the same way as the Serializer does.
+    """
+    def make_node(content):
+        cls, contents = content
+        if cls is nodes.literal:
+            return nodes.literal(text=contents)
+        else:
+            node = cls()
+            pending.append((node, contents))
+            return node
+
+    def make_text(text):
+        if text and text != '\n':  # a single newline is not filled, like the Serializer
+            return (text, False)
+        else:
+            return None
+
+    pending = []
+    items = [(content, False) if isinstance(content, str_types) else make_node(content)
+             for content in parse(text)]
+    index = 0
+    while index < len(pending):  # not recursive; emphasis might be nested deeply
+        node, contents = pending[index]
+        leading, children = split_contents(contents)
+        pending[index] = (node, make_text(leading), [(make_node(child), make_text(tail)) for child, tail in children])
+        index += 1
+
+    # fill the innermost nodes first; attaching a node to a deep tree walks up to the root
+    for node, leading, children in reversed(pending):
+        fill_node(node, leading, children)
+
+    return items
+
+
+def make_elements(text):
+    """Parse *text* into the leading text and a list of ElementTree elements.
+
+    All texts are atomic; they are not processed by the inline patterns of
+    Python-Markdown.
+    """
+    def make_element(content, tail):
+        cls, contents = content
+        element = etree.Element(TAGS[cls])
+        if tail:
+            element.tail = AtomicString(tail)
+        if cls is nodes.literal:
+            element.text = AtomicString(contents)
+        else:
+            pending.append((element, contents))
+        return element
+
+    def fill(element, contents):
+        leading, children = split_contents(contents)
+        if leading:
+            element.text = AtomicString(leading)
+        return [make_element(child, tail) for child, tail in children]
+
+    pending = []
+    root = etree.Element('div')
+    elements = fill(root, parse(text))
+    while pending:
+        element, contents = pending.pop()
+        element.extend(fill(element, contents))
+
+    return root.text, elements
+
+
+class DeferPathologicalText(object):
+    """Keep the pathological texts from the inline patterns of Python-Markdown.
+
+    This runs before the inline patterns are applied.  Each pathological
+    text (or tail) is moved to a placeholder element having the text as
+    atomic; the text (or tail) of the element is left empty.
+    """
+
+    def run(self, root):
+        for element in list(root.iter()):
+            text = element.text
+            if text and not isinstance(text, AtomicString) and is_pathological(text):
+                note_fallback(text)
+                element.text = None
+                element.insert(0, make_placeholder(text))
+
+            for index, child in reversed(list(enumerate(element))):
+                tail = child.tail
+                if tail and not isinstance(tail, AtomicString) and is_pathological(tail):
+                    note_fallback(tail)
+                    child.tail = None
+                    element.insert(index + 1, make_placeholder(tail))
+
+
+def make_placeholder(text):
+    placeholder = etree.Element(PLACEHOLDER_TAG)
+    placeholder.text = AtomicString(text)
+    return placeholder
+
+
+class ParsePathologicalText(object):
+    """Replace the placeholders of :class:`DeferPathologicalText` by the parsed contents.
+
+    This runs after the inline patterns are applied.  The children of an
+    element are replaced at once; inserting them one by one takes quadratic
+    time.
+    """
+
+    def run(self, root):
+        for element in list(root.iter()):
+            if not any(child.tag == PLACEHOLDER_TAG for child in element):
+                continue
+
+            children = []
+            for child in element:
+                if child.tag != PLACEHOLDER_TAG:
+                    children.append(child)
+                    continue
+
+                leading, elements = make_elements(child.text)
+                if leading:
+                    if children:
+                        children[-1].tail = leading
+                    else:
+                        element.text = leading
+                children.extend(elements)
+            element[:] = children
+
+
+class InlineProcessor(treeprocessors.InlineProcessor):
+    """The inline processor checking the time budget on each text and each match of patterns."""
+
+    def _InlineProcessor__handleInline(self, data, patternIndex=0):
+        check_time_budget()
+        return treeprocessors.InlineProcessor._InlineProcessor__handleInline(self, data, patternIndex)
+
+    def _InlineProcessor__stashNode(self, node, type):
+        check_time_budget()
+        return treeprocessors.InlineProcessor._InlineProcessor__stashNode(self, node, type)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.outdated
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Outdated detection of Markdown documents by the digest of their sources.
+
+    Sphinx re-reads a document if its source file is newer than the last
+    read, even if its content is not changed (ex. a fresh checkout).  The
+    digests of Markdown sources are kept in the environment, and the
+    documents having the same digests are not read again.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import hashlib
+
+
+def get_digest(filename):
+    """Return the digest of the file, or None if not readable."""
+    hashed = hashlib.sha1()
+    try:
+        with open(filename, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(65536), b''):
+                hashed.update(chunk)
+    except (IOError, OSError):
+        return None
+
+    return hashed.hexdigest()
+
+
+def record(env):
+    """Store the digest of the document being read to the environment."""
+    digests = getattr(env, 'markdown_digests', None)
+    if digests is None:
+        digests = env.markdown_digests = {}
+
+    digests[env.docname] = get_digest(str(env.doc2path(env.docname)))
+
+
+def is_unchanged(env, docname, digests):
+    """Return True if the content of *docname* is the same as the last read."""
+    if docname in env.reread_always or env.dependencies.get(docname):
+        return False  # the dependencies might be changed
+    elif not os.path.exists(os.path.join(str(env.doctreedir), docname + '.doctree')):
+        return False
+
+    digest = digests.get(docname)
+    return digest is not None and digest == get_digest(str(env.doc2path(docname)))
+
+
+def touch(env, docname):
+    """Mark *docname* as read now, not to check it again until it is modified."""
+    try:
+        mtime = max(time.time(), os.path.getmtime(str(env.doc2path(docname))))
+    except (IOError, OSError):
+        mtime = time.time()
+
+    if isinstance(env.all_docs[docname], int):  # in microseconds
+        env.all_docs[docname] = int(mtime * 1000000)
+    else:
+        env.all_docs[docname] = mtime
+
+
+def on_env_get_outdated(app, env, added, changed, removed):
+    digests = getattr(env, 'markdown_digests', None)
+    if digests:
+        for docname in list(changed):
+            if is_unchanged(env, docname, digests):
+                changed.discard(docname)
+                touch(env, docname)
+
+    return []
+
+
+def on_env_purge_doc(app, env, docname):
+    getattr(env, 'markdown_digests', {}).pop(docname, None)
+
+
+def on_env_merge_info(app, env, docnames, other):
+    digests = getattr(other, 'markdown_digests', {})
+    for docname in docnames:
+        if docname in digests:
+            if getattr(env, 'markdown_digests', None) is None:
+                env.markdown_digests = {}
+            env.markdown_digests[docname] = digests[docname]
+
+
+def setup(app):
+    app.connect('env-get-outdated', on_env_get_outdated)
+    app.connect('env-purge-doc', on_env_purge_doc)
+    app.connect('env-merge-info', on_env_merge_info)
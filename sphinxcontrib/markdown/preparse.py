@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.preparse
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Conversion of outdated Markdown documents in a process pool before
+    Sphinx reads them.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import io
+import os
+import pickle
+import multiprocessing
+from functools import partial
+from sphinxcontrib.markdown import get_backend, get_parse_cache, get_time_budget, inline, limit_time
+from sphinxcontrib.markdown.batch import chunked
+
+DEFAULT_CHUNKSIZE = 4
+
+
+def convert_texts(backend, texts, time_budget=None):
+    """Convert a chunk of Markdown texts to pickled doctrees with *backend*.
+
+    The result of a document failed to convert (or exceeded *time_budget*,
+    or having texts parsed by :func:`inline.parse`) is None; such a document
+    is converted again by the reader to report the error.
+    """
+    md2node = get_backend(backend).md2node
+    results = []
+    for text in texts:
+        try:
+            with limit_time(time_budget), inline.record_fallbacks() as fallbacks:
+                doctree = md2node(text)
+            if fallbacks:
+                results.append(None)
+            else:
+                results.append(pickle.dumps(doctree, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            results.append(None)
+
+    return results
+
+
+class Preparser(object):
+    """Convert Markdown documents in a process pool ahead of reading.
+
+    The documents are converted chunk by chunk in the given order, while the
+    main process goes on (ex. reading reStructuredText documents).
+    :meth:`get` waits only for the chunk having the document.
+    """
+
+    def __init__(self, backend='markdown', processes=None, chunksize=DEFAULT_CHUNKSIZE, time_budget=None):
+        self.backend = backend
+        self.processes = processes
+        self.chunksize = chunksize
+        self.time_budget = time_budget
+        self.pool = None
+        self.documents = {}  # docname -> (text, result of the chunk, index in the chunk)
+
+    def start(self, documents):
+        """Start converting *documents*, a list of pairs of docname and text."""
+        if not documents:
+            return
+
+        self.pool = multiprocessing.Pool(self.processes)
+        convert = partial(convert_texts, self.backend, time_budget=self.time_budget)
+        for chunk in chunked(documents, self.chunksize):
+            result = self.pool.apply_async(convert, ([text for _, text in chunk],))
+            for index, (docname, text) in enumerate(chunk):
+                self.documents[docname] = (text, result, index)
+        self.pool.close()
+
+    def get(self, docname, text):
+        """Return the converted doctree of *docname*, waiting for it if needed.
+
+        Returns None if the document is not converted ahead, or if its *text*
+        is not the converted one (ex. changed by ``source-read`` handlers).
+        """
+        entry = self.documents.pop(docname, None)
+        if entry is None or entry[0] != text:
+            return None
+
+        try:
+            doctree = entry[1].get()[entry[2]]
+        except Exception:
+            return None  # the worker is broken; convert it again
+
+        if doctree is None:
+            return None
+        else:
+            return pickle.loads(doctree)
+
+    def wait(self):
+        """Wait for all documents to be converted, and shut down the pool.
+
+        The results are kept; they are available even in the processes
+        forked after that (ex. the readers of parallel builds).
+        """
+        if self.pool is not None:
+            self.pool.join()
+            self.pool = None
+
+    def terminate(self):
+        """Discard the results not used, and shut down the pool."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.documents.clear()
+
+    def __len__(self):
+        return len(self.documents)
+
+
+def get_markdown_suffixes(config):
+    source_suffix = config.source_suffix
+    if isinstance(source_suffix, dict):  # Sphinx-1.8 or above
+        return tuple(suffix for suffix, filetype in source_suffix.items() if filetype == 'markdown')
+    else:
+        return ('.md',)
+
+
+def collect_documents(app, env, docnames):
+    """Return the pairs of docname and text of the Markdown documents to convert.
+
+    The documents already in the parse cache are not converted again.
+    """
+    suffixes = get_markdown_suffixes(app.config)
+    cache = get_parse_cache(app.config, env.srcdir)
+    documents = []
+    for docname in docnames:
+        filename = str(env.doc2path(docname))
+        if not filename.endswith(suffixes):
+            continue
+
+        try:
+            with io.open(filename, encoding=app.config.source_encoding) as fd:
+                text = fd.read()
+        except (IOError, OSError, UnicodeError):
+            continue  # the reader reports the error
+
+        if cache and os.path.exists(cache.filename(text)):
+            continue
+        documents.append((docname, text))
+
+    return documents
+
+
+preparsers = {}
+
+
+def on_env_before_read_docs(app, env, docnames):
+    stop(app, env)
+    if app.config.markdown_preparse_jobs <= 0 or app.config.markdown_incremental:
+        return
+
+    documents = collect_documents(app, env, docnames)
+    if len(documents) < 2:
+        return  # not worth starting the pool
+
+    preparser = Preparser(app.config.markdown_backend, app.config.markdown_preparse_jobs,
+                          time_budget=get_time_budget(app.config))
+    preparser.start(documents)
+    preparsers[env.srcdir] = preparser
+    if getattr(app, 'parallel', 0) > 1:
+        # the readers are forked from this process; share the results with them
+        preparser.wait()
+    else:
+        # read the other documents first while the Markdown documents are converted
+        markdown_docnames = set(docname for docname, _ in documents)
+        docnames[:] = ([docname for docname in docnames if docname not in markdown_docnames] +
+                       [docname for docname in docnames if docname in markdown_docnames])
+
+
+def get_preparsed(env, text):
+    """Return the doctree of the document being read if it was converted ahead."""
+    preparser = preparsers.get(env.srcdir)
+    if preparser is None:
+        return None
+    else:
+        return preparser.get(env.docname, text)
+
+
+def stop(app, env):
+    preparser = preparsers.pop(env.srcdir, None)
+    if preparser is not None:
+        preparser.terminate()
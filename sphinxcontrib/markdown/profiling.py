@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.markdown.profiling
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Per-document timing instrumentation of MarkdownParser.
+
+    :license: BSD, see LICENSE for details.
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+
+STAGES = ('markdown', 'serialize', 'sections', 'convert', 'targets')
+REPORT_FILENAME = 'markdown-profile.json'
+SLOWEST_DOCUMENTS = 10
+
+
+def record(env, inputstring, document, timings):
+    """Store the timings of the document being read to the environment."""
+    profiles = getattr(env, 'markdown_profiles', None)
+    if profiles is None:
+        profiles = env.markdown_profiles = {}
+
+    profiles[env.docname] = {
+        'timings': timings,
+        'total': sum(timings.values()),
+        'size': len(inputstring),
+        'nodes': sum(1 for _ in document.traverse()) - 1,  # exclude the document
+    }
+
+
+def format_timings(timings):
+    return ' '.join('%s=%.1fms' % (stage, timings[stage] * 1000) for stage in STAGES if stage in timings)
+
+
+def write_report(filename, profiles):
+    totals = {}
+    for profile in profiles.values():
+        for stage, elapsed in profile['timings'].items():
+            totals[stage] = totals.get(stage, 0) + elapsed
+
+    report = {
+        'documents': profiles,
+        'total': {
+            'documents': len(profiles),
+            'timings': totals,
+            'total': sum(totals.values()),
+        },
+    }
+    with open(filename, 'w') as fd:
+        json.dump(report, fd, indent=2, sort_keys=True)
+
+    return report
+
+
+def info(app, message):
+    try:
+        from sphinx.util import logging
+        logging.getLogger(__name__).info(message)
+    except ImportError:  # Sphinx-1.5 or older
+        app.info(message)
+
+
+def on_env_before_read_docs(app, env, docnames):
+    if app.config.markdown_profile:
+        env.markdown_profiles = {}  # profile documents read in this build only
+
+
+def on_env_purge_doc(app, env, docname):
+    getattr(env, 'markdown_profiles', {}).pop(docname, None)
+
+
+def on_env_merge_info(app, env, docnames, other):
+    profiles = getattr(other, 'markdown_profiles', {})
+    for docname in docnames:
+        if docname in profiles:
+            if getattr(env, 'markdown_profiles', None) is None:
+                env.markdown_profiles = {}
+            env.markdown_profiles[docname] = profiles[docname]
+
+
+def on_build_finished(app, exception):
+    profiles = getattr(app.env, 'markdown_profiles', None)
+    if not app.config.markdown_profile or exception or not profiles:
+        return
+
+    filename = app.config.markdown_profile_report or os.path.join(app.outdir, REPORT_FILENAME)
+    report = write_report(filename, profiles)
+
+    info(app, 'markdown profile: %d documents in %.1fms (%s)' %
+         (report['total']['documents'], report['total']['total'] * 1000,
+          format_timings(report['total']['timings'])))
+    slowest = sorted(profiles.items(), key=lambda item: item[1]['total'], reverse=True)
+    for docname, profile in slowest[:SLOWEST_DOCUMENTS]:
+        info(app, '    %s: %.1fms (%s) nodes=%d' %
+             (docname, profile['total'] * 1000, format_timings(profile['timings']), profile['nodes']))
+    info(app, 'markdown profile report: %s' % filename)
+
+
+def setup(app):
+    app.connect('env-before-read-docs', on_env_before_read_docs)
+    app.connect('env-purge-doc', on_env_purge_doc)
+    app.connect('env-merge-info', on_env_merge_info)
+    app.connect('build-finished', on_build_finished)
@@ -1,7 +1,4 @@
 # -*- coding: utf-8 -*-
 
 master_doc = 'index'
-source_suffix = ['.rst', '.md']
-source_parsers = {
-    '.md': 'sphinxcontrib.markdown.MarkdownParser'
-}
+extensions = ['sphinxcontrib.markdown']
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+master_doc = 'index'
+extensions = ['sphinxcontrib.markdown']
+
+
+def record_reader(app, doctree):
+    # the process which read the document; checked by the parallel build test
+    doctree['reader_pid'] = os.getpid()
+
+
+def setup(app):
+    app.connect('doctree-read', record_reader)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import test_markdown
+import test_streaming
+from textwrap import dedent
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import BACKENDS, get_backend, md2node, MarkdownParser
+from sphinxcontrib.markdown.incremental import IncrementalConverter
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+#: tests which check the result of conversion; they are run against every backend
+CONFORMANCE_TESTS = [
+    (test_markdown.TestSphinxcontrib, [
+        'test_simple',
+        'test_inline',
+        'test_links',
+        'test_email_having_entities',
+        'test_html',
+        'test_html_in_tail',
+        'test_multiple_sections',
+        'test_deep_sections',
+        'test_irregular_sections',
+        'test_section_ids',
+        'test_setext_header',
+        'test_bullet_list',
+        'test_nested_bullet_list',
+        'test_list_item_having_raw_html_and_inline_nodes',
+        'test_ol',
+        'test_codeblock',
+        'test_fenced_code',
+        'test_quote',
+        'test_engine_is_reset_between_documents',
+        'test_unknown_element',
+    ]),
+    (test_streaming.TestStreaming, [
+        'test_iter_md2node',
+        'test_iter_md2node_for_empty_document',
+        'test_parse_without_sphinx',
+    ]),
+]
+
+DOCUMENT = dedent(u"""
+    # Headings
+
+    Hello *world* with [link][1]
+
+    [1]: http://example.com/
+
+    * item 1
+    * item 2
+
+    ## Sub headings
+
+        code block
+""")
+
+#: documents converted by every backend; the doctrees are compared with those of the markdown backend
+CORPUS = [
+    DOCUMENT,
+    dedent(u"""
+        Title
+        =====
+
+        Hello *emphasis*, **strong**, ***both***, _under_score_ and snake_case_word
+        with `code`, ``a`b``, [link](http://example.com/ "title"), ![image](/a.png)
+        and [reference][1], <span>html</span> &amp; &copy; <me@example.com> <http://example.com/>
+
+        Escaped \\*text\\* \\{braces\\} \\_ \\` \\\\
+
+        [1]: http://example.com/ "Example"
+
+        Sub title
+        ---------
+
+        1. first
+        2. second
+            * nested
+                * deeper
+
+        * loose item
+
+            continued paragraph
+
+                code in item
+
+
+                after blank lines
+
+        > quoted **text**
+        > > nested quote
+
+            code
+            \n
+
+            more code
+
+
+            after blank lines
+
+        <div class="note">
+        <div>nested <b>raw</b> HTML</div>
+
+        </div>
+
+        <!-- comment -->
+
+        ### Hash header ###
+    """),
+    u"    a\n\n\n    b\n\n\n\n    c\n",
+    u"<div>\n\n</div>\n\n\n    code\n\n\n    more\n",
+    u"**`e`__u__** *c**__d__*** [a *b* `c`](/d) <b>*not*</b> a_b_c __*x*__\n",
+]
+
+
+class BackendTests(object):
+    backend = None
+
+    def setUp(self):
+        backend = get_backend(self.backend)
+        patchers = [
+            mock.patch.object(test_markdown, 'md2node', backend.md2node),
+            mock.patch.object(test_streaming, 'md2node', backend.md2node),
+            mock.patch.object(test_streaming, 'iter_md2node', backend.iter_md2node),
+            mock.patch.object(MarkdownParser, 'default_backend', self.backend),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_same_doctrees(self):
+        backend = get_backend(self.backend)
+        for text in CORPUS:
+            self.assertEqual(md2node(text).pformat(), backend.md2node(text).pformat())
+
+    def test_incremental(self):
+        converter = IncrementalConverter(backend=self.backend)
+        self.assertEqual(md2node(DOCUMENT).pformat(), converter.convert(DOCUMENT).pformat())
+
+        text = DOCUMENT.replace('item 2', 'item 3')
+        self.assertEqual(md2node(text).pformat(), converter.convert(text).pformat())
+
+    def test_convert_with_timings(self):
+        timings = {}
+        sections = []
+        doc = get_backend(self.backend).convert_with_timings(DOCUMENT, timings, sections)
+        self.assertEqual([node.pformat() for node in md2node(DOCUMENT)],
+                         [node.pformat() for node in doc])
+        self.assertEqual(2, len(sections))
+        self.assertTrue(timings)
+
+    def test_build(self):
+        @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+                  confoverrides={'markdown_backend': self.backend})
+        def build(app, status, warnings):
+            app.build()
+            self.assertEqual('', warnings.getvalue())
+            return test_markdown.load_doctree(app, 'index')
+
+        @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True)
+        def build_with_default(app, status, warnings):
+            app.build()
+            return test_markdown.load_doctree(app, 'index')
+
+        self.assertEqual(build_with_default(), build())
+
+
+for testcase, names in CONFORMANCE_TESTS:
+    for name in names:
+        setattr(BackendTests, name, vars(testcase)[name])
+
+for name in BACKENDS:
+    classname = 'Test%sBackend' % name.capitalize()
+    globals()[classname] = type(classname, (BackendTests, unittest.TestCase), {'backend': name})
+
+
+class TestGetBackend(unittest.TestCase):
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend('unknown')
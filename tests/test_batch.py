@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown.batch import batch_md2node, batch_convert_files, main
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+
+def make_text(i):
+    return u"# Headings %d\n\nHello *world* %d\n\n* item\n* item\n" % (i, i)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_files(self, count):
+        filenames = []
+        for i in range(count):
+            filename = os.path.join(self.tmpdir, 'doc%d.md' % i)
+            with io.open(filename, 'w', encoding='utf-8') as fd:
+                fd.write(make_text(i))
+            filenames.append(filename)
+
+        return filenames
+
+    def test_batch_md2node(self):
+        texts = [make_text(i) for i in range(10)]
+        for processes in (1, 2):
+            results = list(batch_md2node(texts, processes=processes, chunksize=3))
+            self.assertEqual([md2node(text).pformat() for text in texts],
+                             [pickle.loads(result).pformat() for result in results])
+
+    def test_batch_convert_files(self):
+        filenames = self.write_files(5)
+        results = list(batch_convert_files(filenames, processes=2, chunksize=2))
+        self.assertEqual(filenames, [filename for filename, _ in results])
+        self.assertEqual(md2node(make_text(3)).pformat(), pickle.loads(results[3][1]).pformat())
+
+    def test_main(self):
+        filenames = self.write_files(3)
+        self.assertEqual(0, main(['-j', '2', '--chunksize', '1'] + filenames))
+        with open(os.path.join(self.tmpdir, 'doc1.doctree'), 'rb') as fd:
+            self.assertEqual(md2node(make_text(1)).pformat(), pickle.load(fd).pformat())
+
+        outdir = os.path.join(self.tmpdir, 'out')
+        self.assertEqual(0, main(['-o', outdir] + filenames))
+        self.assertEqual(['doc0.doctree', 'doc1.doctree', 'doc2.doctree'], sorted(os.listdir(outdir)))
+
+    def test_main_same_names(self):
+        filenames = []
+        for i, dirname in enumerate(['x', os.path.join('y', 'z')]):
+            os.makedirs(os.path.join(self.tmpdir, dirname))
+            filenames.append(os.path.join(self.tmpdir, dirname, 'README.md'))
+            with io.open(filenames[-1], 'w', encoding='utf-8') as fd:
+                fd.write(make_text(i))
+
+        # the paths relative to the common directory of the inputs are kept
+        outdir = os.path.join(self.tmpdir, 'out')
+        self.assertEqual(0, main(['-o', outdir] + filenames))
+        for i, dirname in enumerate(['x', os.path.join('y', 'z')]):
+            with open(os.path.join(outdir, dirname, 'README.doctree'), 'rb') as fd:
+                self.assertEqual(md2node(make_text(i)).pformat(), pickle.load(fd).pformat())
+
+    def test_main_missing_file(self):
+        self.assertEqual(1, main([os.path.join(self.tmpdir, 'missing.md')]))
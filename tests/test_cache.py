@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from docutils import nodes
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown.cache import FragmentCache, ParseCache
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachedir = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, True)
+
+    def test_get_and_set(self):
+        cache = ParseCache(self.cachedir, 1024 * 1024, '1.0')
+        self.assertIsNone(cache.get(u'# Headings'))
+
+        cache.set(u'# Headings', md2node(u'# Headings'))
+        doc = cache.get(u'# Headings')
+        self.assertIsInstance(doc, nodes.container)
+        self.assertIsInstance(doc[0], nodes.section)
+        self.assertEqual('Headings', doc[0][0].astext())
+
+        # different source
+        self.assertIsNone(cache.get(u'# Headings 2'))
+
+        # different version of extension
+        cache = ParseCache(self.cachedir, 1024 * 1024, '2.0')
+        self.assertIsNone(cache.get(u'# Headings'))
+
+    def test_prune(self):
+        cache = ParseCache(self.cachedir, 1024 * 1024, '1.0')
+        now = time.time()
+        for i, source in enumerate([u'# Doc 1', u'# Doc 2', u'# Doc 3']):
+            cache.set(source, md2node(source))
+            os.utime(cache.filename(source), (now - 100 + i, now - 100 + i))
+
+        # Doc 1 becomes the most recently used
+        self.assertIsNotNone(cache.get(u'# Doc 1'))
+
+        size = os.path.getsize(cache.filename(u'# Doc 1'))
+        cache.max_size = size * 2
+        cache.prune()
+        self.assertIsNotNone(cache.get(u'# Doc 1'))
+        self.assertIsNone(cache.get(u'# Doc 2'))
+        self.assertIsNotNone(cache.get(u'# Doc 3'))
+
+    def test_broken_entry(self):
+        cache = ParseCache(self.cachedir, 1024 * 1024, '1.0')
+        cache.set(u'# Headings', md2node(u'# Headings'))
+        with open(cache.filename(u'# Headings'), 'wb') as fd:
+            fd.write(b'broken')
+
+        self.assertIsNone(cache.get(u'# Headings'))
+
+    def test_build_with_cache(self):
+        confoverrides = {'markdown_cache_dir': self.cachedir}
+
+        @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+                  confoverrides=confoverrides)
+        def build(app, status, warnings):
+            app.build()
+            self.assertEqual('', warnings.getvalue())
+            return app.env.get_doctree('index').astext()
+
+        doctree = build()
+        self.assertEqual(1, len(os.listdir(self.cachedir)))
+
+        # second build reuses the cached doctree
+        with mock.patch('sphinxcontrib.markdown.md2node') as md2node_mock:
+            self.assertEqual(doctree, build())
+            self.assertFalse(md2node_mock.called)
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = FragmentCache(2)
+        self.assertIsNone(cache.get('doc1'))
+
+        subnodes = md2node(u'# Headings\n\nHello *world*').children
+        cache.set('doc1', subnodes)
+        copied = cache.get('doc1')
+        self.assertEqual([node.pformat() for node in subnodes], [node.pformat() for node in copied])
+        self.assertIsNot(subnodes[0], copied[0])
+        self.assertIsNone(copied[0].parent)
+
+        # the copies do not share nodes each other
+        document = nodes.container()
+        document.extend(copied)
+        self.assertIsNot(copied[0][1], cache.get('doc1')[0][1])
+        self.assertEqual({'hits': 2, 'misses': 1, 'entries': 1, 'max_entries': 2}, cache.stats())
+
+    def test_lru(self):
+        cache = FragmentCache(2)
+        for key in ('doc1', 'doc2'):
+            cache.set(key, [nodes.paragraph(text=key)])
+
+        # doc1 becomes the most recently used
+        self.assertIsNotNone(cache.get('doc1'))
+        cache.set('doc3', [nodes.paragraph(text='doc3')])
+        self.assertEqual(2, len(cache))
+        self.assertIsNotNone(cache.get('doc1'))
+        self.assertIsNone(cache.get('doc2'))
+        self.assertIsNotNone(cache.get('doc3'))
+
+        cache.resize(1)
+        self.assertEqual(1, len(cache))
+        self.assertIsNotNone(cache.get('doc3'))
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_fragment_cache_size': 100})
+    def test_build_with_fragment_cache(self, app, status, warnings):
+        app.build()
+        self.assertEqual('', warnings.getvalue())
+        self.assertIn('markdown fragment cache:', status.getvalue())
+        self.assertEqual(md2node(app.srcdir.joinpath('index.md').read_text()).astext(),
+                         app.env.get_doctree('index').astext())
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+from sphinxcontrib.markdown.daemon import (
+    Converter, RPCError, Service, serve_socket, serve_stdio, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR
+)
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def request(method, params=None, request_id=1):
+    message = {'jsonrpc': '2.0', 'method': method, 'id': request_id}
+    if params is not None:
+        message['params'] = params
+    return json.dumps(message)
+
+
+class TestConverter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'index.md')
+        self.write(u"# Headings\n\nHello *world*\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, text):
+        with io.open(self.path, 'w', encoding='utf-8') as fd:
+            fd.write(text)
+
+    def test_convert(self):
+        converter = Converter()
+        result = converter.convert(u"# Headings\n\nHello *world*\n")
+        self.assertFalse(result['cached'])
+        self.assertIn('<section ids="section-1">', result['output'])
+        self.assertIn('<emphasis>', result['output'])
+
+        result = converter.convert(u"Hello *world*\n", format='html')
+        self.assertEqual('<p>Hello <em>world</em></p>\n', result['output'])
+
+        expected = converter.convert(u"Hello `code`\n")['output']
+        self.assertEqual(expected, converter.convert(u"Hello `code`\n", backend='direct')['output'])
+
+    def test_cache(self):
+        converter = Converter()
+        first = converter.convert(path=self.path)
+        self.assertFalse(first['cached'])
+        self.assertIn('Hello ', first['output'])
+        self.assertEqual(dict(first, cached=True), converter.convert(path=self.path))
+
+        # the options are changed
+        self.assertFalse(converter.convert(path=self.path, format='html')['cached'])
+        self.assertTrue(converter.convert(path=self.path, format='html')['cached'])
+
+        # the file is changed
+        self.write(u"Hello *Sphinx*\n")
+        result = converter.convert(path=self.path, format='html')
+        self.assertFalse(result['cached'])
+        self.assertEqual('<p>Hello <em>Sphinx</em></p>\n', result['output'])
+
+        # the text being edited is given with the path
+        result = converter.convert(u"Hello *editor*\n", path=self.path, format='html')
+        self.assertFalse(result['cached'])
+        self.assertEqual('<p>Hello <em>editor</em></p>\n', result['output'])
+
+    def test_cache_size(self):
+        converter = Converter()
+        with mock.patch('sphinxcontrib.markdown.daemon.MAX_RESULTS', 2):
+            for name in ('a.md', 'b.md', 'a.md', 'c.md'):  # a.md is cached at the 2nd time
+                converter.convert(u"Hello *%s*\n" % name, path=os.path.join(self.tmpdir, name))
+
+        self.assertEqual([os.path.join(self.tmpdir, name) for name in ('a.md', 'c.md')], list(converter.results))
+        self.assertTrue(converter.convert(u"Hello *a.md*\n", path=os.path.join(self.tmpdir, 'a.md'))['cached'])
+        self.assertFalse(converter.convert(u"Hello *b.md*\n", path=os.path.join(self.tmpdir, 'b.md'))['cached'])
+
+        # the texts are not kept
+        for (digest, _, _), _ in converter.results.values():
+            self.assertEqual(40, len(digest))
+
+    def test_errors(self):
+        converter = Converter(time_budget=0.000001)
+        with self.assertRaises(RPCError):
+            converter.convert()
+        with self.assertRaises(RPCError):
+            converter.convert(u"Hello", format='latex')
+        with self.assertRaises(RPCError):
+            converter.convert(path=os.path.join(self.tmpdir, 'unknown.md'))
+        with self.assertRaises(RPCError):
+            converter.convert(u"Hello *world*\n\n" * 100)
+
+
+class TestService(unittest.TestCase):
+    def test_handle(self):
+        service = Service(Converter())
+        response = json.loads(service.handle(request('convert', {'text': u"Hello", 'format': 'html'}, 'a')))
+        self.assertEqual({'jsonrpc': '2.0', 'id': 'a', 'result': {'output': '<p>Hello</p>\n', 'cached': False}},
+                         response)
+
+        response = json.loads(service.handle('{"method": "convert", '))
+        self.assertEqual(PARSE_ERROR, response['error']['code'])
+
+        response = json.loads(service.handle(request('unknown')))
+        self.assertEqual(METHOD_NOT_FOUND, response['error']['code'])
+
+        response = json.loads(service.handle(request('convert', {'source': u"Hello"})))
+        self.assertEqual(INVALID_PARAMS, response['error']['code'])
+
+        for params in ({'text': 5}, {'text': u"Hello", 'format': ['html']}, {'path': {}}, {'backend': True}):
+            response = json.loads(service.handle(request('convert', params)))
+            self.assertEqual(INVALID_PARAMS, response['error']['code'])
+
+        response = json.loads(service.handle(request('convert', {'text': u"Hello", 'path': None, 'format': None})))
+        self.assertIn('Hello', response['result']['output'])
+
+        # notifications are not answered
+        self.assertIsNone(service.handle(json.dumps({'jsonrpc': '2.0', 'method': 'convert', 'params': {}})))
+
+    def test_serve_stdio(self):
+        stdin = io.StringIO(u'\n'.join([request('convert', {'text': u"Hello"}, 1),
+                                        request('shutdown', request_id=2),
+                                        request('convert', {'text': u"Unread"}, 3)]) + u'\n')
+        stdout = io.StringIO()
+        serve_stdio(Service(Converter()), stdin, stdout)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([1, 2], [response['id'] for response in responses])
+        self.assertIn('Hello', responses[0]['result']['output'])
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix domain socket is not available')
+    def test_serve_socket(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'markdown.sock')
+            thread = threading.Thread(target=serve_socket, args=(Service(Converter()), path))
+            thread.start()
+            while not os.path.exists(path):
+                time.sleep(0.01)
+
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(path)
+            stream = client.makefile('rwb')
+            try:
+                for request_id, method, params in [(1, 'convert', {'text': u"Hello *world*", 'format': 'html'}),
+                                                   (2, 'shutdown', None)]:
+                    stream.write(request(method, params, request_id).encode('utf-8') + b'\n')
+                    stream.flush()
+                    response = json.loads(stream.readline().decode('utf-8'))
+                    self.assertEqual(request_id, response['id'])
+                self.assertIsNone(response['result'])
+            finally:
+                stream.close()
+                client.close()
+
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+            self.assertFalse(os.path.exists(path))
+        finally:
+            shutil.rmtree(tmpdir)
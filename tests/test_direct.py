@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from textwrap import dedent
+from docutils import nodes
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown import direct
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+
+class TestDirect(unittest.TestCase):
+    def assertSameAsMarkdown(self, markdown):
+        self.assertEqual(md2node(markdown).pformat(), direct.md2node(markdown).pformat())
+
+    def test_same_as_markdown(self):
+        markdown = dedent(u"""
+        Title
+        =====
+
+        Hello *emphasis* and **strong** with `code`, [link][1] and <span>html</span>.
+
+        [1]: http://example.com/ "Example"
+
+        * tight item
+        * item with ![image](/path/to/image.png "title")
+            1. nested *enumerated* item
+
+        * loose item
+
+            continued paragraph
+
+        > quoted **text**
+        > > nested quote
+
+            def hello():
+                return 1 < 2
+
+        <div class="note">
+        <p>raw HTML block</p>
+        </div>
+
+        Sub title
+        ---------
+
+        Escaped \\*text\\* &amp; <me@example.com> and <http://example.com/>
+        """)
+        self.assertSameAsMarkdown(markdown)
+
+    def test_emphasis_inside_emphasis(self):
+        # Python-Markdown applies inline patterns again to the texts inside inline elements
+        for markdown in [u"**`e`__u__**", u"**[a](b) __u__**", u"*c**__d__***", u"**`e` *__u__***"]:
+            self.assertSameAsMarkdown(markdown)
+
+    def test_blank(self):
+        self.assertEqual('', direct.md2node(u"\n  \n"))
+
+    def test_blank_lines_in_code_blocks(self):
+        for blank_lines in range(1, 5):
+            self.assertSameAsMarkdown(u"    a\n" + u"\n" * blank_lines + u"    b\n")
+            self.assertSameAsMarkdown(u"    a\n    \n" + u"\n" * blank_lines + u"    b\n")
+            self.assertSameAsMarkdown(u"* item\n\n        a\n" + u"\n" * blank_lines + u"        b\n")
+            self.assertSameAsMarkdown(u"<div>\nraw\n</div>\n" + u"\n" * blank_lines + u"    a\n\n\n    b\n")
+
+        self.assertEqual(u"a\n\n\nb\n", direct.md2node(u"    a\n\n\n    b\n").astext())
+
+    def test_nested_html_blocks(self):
+        self.assertSameAsMarkdown(u"<div>\n<div>inner</div>\n\n</div>\n\nHello\n")
+        self.assertSameAsMarkdown(u"<div class=\"a\">\n\n<div>\n\ninner\n</div>\n\n</div>\n\nHello\n")
+        self.assertSameAsMarkdown(u"<!-- comment\n\n-->\n\n<hr/>\n\n<?php echo 1 ?>\n\nHello\n")
+
+    def test_iter_md2node(self):
+        sections = []
+        doc = list(direct.iter_md2node(u"# Headings\n\n## Sub headings\n\nHello world\n", sections))
+        self.assertEqual(1, len(doc))
+        self.assertIsInstance(doc[0], nodes.section)
+        self.assertEqual(['Headings', 'Sub headings'], [node[0].astext() for node in sections])
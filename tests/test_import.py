@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+#: modules which should not be imported until the first parse
+DEFERRED_MODULES = ('markdown', 'html.entities', 'htmlentitydefs', 'sphinx')
+
+#: the budget of ``import sphinxcontrib.markdown`` in seconds (docutils is loaded by Sphinx beforehand)
+IMPORT_TIME_BUDGET = 0.05
+
+
+def import_times(statement):
+    """Run *statement* in a new interpreter; returns the cumulative import times of modules."""
+    command = [sys.executable, '-X', 'importtime', '-c', statement]
+    output = subprocess.check_output(command, stderr=subprocess.STDOUT, universal_newlines=True)
+
+    times = {}
+    for line in output.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1000000.0
+
+    return times
+
+
+@unittest.skipIf(sys.version_info < (3, 7), '-X importtime is not supported')
+class TestImport(unittest.TestCase):
+    def test_deferred_modules(self):
+        times = import_times('import sphinxcontrib.markdown')
+        self.assertIn('sphinxcontrib.markdown', times)
+        for name in times:
+            self.assertNotIn(name.split('.')[0], DEFERRED_MODULES)
+            self.assertNotIn(name, DEFERRED_MODULES)
+
+    def test_import_time(self):
+        times = import_times('import docutils.nodes, docutils.parsers; import sphinxcontrib.markdown')
+        self.assertLess(times['sphinxcontrib.markdown'], IMPORT_TIME_BUDGET)
+
+    def test_imported_on_first_parse(self):
+        statement = ('import sys; from sphinxcontrib.markdown import md2node; '
+                     'assert "markdown" not in sys.modules; md2node(u"Hello"); '
+                     'assert "markdown" in sys.modules')
+        subprocess.check_call([sys.executable, '-c', statement])
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import random
+from textwrap import dedent
+from docutils import nodes
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import get_incremental_converter, incremental_converters, md2node
+from sphinxcontrib.markdown.cache import FragmentCache
+from sphinxcontrib.markdown.incremental import IncrementalConverter, convert_block, split_blocks
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+WORDS = ['hello', 'world', '*em*', '**strong**', '`code`', '[link](http://x/)', '[ref]',
+         '[Ref][r2]', '<span>x</span>', '&amp;', '\\*', '_em_', 'a_b', '<me@example.com>']
+
+
+def random_paragraph(rand):
+    return ' '.join(rand.choice(WORDS) for _ in range(rand.randint(1, 6)))
+
+
+def random_block(rand):
+    kind = rand.randint(0, 12)
+    if kind == 0:
+        return '#' * rand.randint(1, 6) + ' ' + random_paragraph(rand)
+    elif kind == 1:
+        return random_paragraph(rand) + '\n' + rand.choice(['---', '===', 'more text'])
+    elif kind == 2:
+        markers = ['* ', '- ', '1. ', '  * ', '    * ']
+        return '\n'.join(rand.choice(markers) + random_paragraph(rand) for _ in range(rand.randint(1, 4)))
+    elif kind == 3:
+        return '    ' + random_paragraph(rand) + '\n    ' + random_paragraph(rand)
+    elif kind == 4:
+        return '> ' + random_paragraph(rand) + '\n>\n> > ' + random_paragraph(rand)
+    elif kind == 5:
+        return rand.choice(['[ref]: http://ref/ "Title"', '[r2]: /path'])
+    elif kind == 6:
+        return random_paragraph(rand) + '\n' + rand.choice(['---', '==='])
+    elif kind == 7:
+        return '<div>\n' + random_paragraph(rand) + '\n\n' + random_paragraph(rand) + '\n</div>'
+    elif kind == 8:
+        return rand.choice(['  ', '\t']) + random_paragraph(rand)
+    elif kind == 9:
+        return '1. ' + random_paragraph(rand) + '\n\n    ' + random_paragraph(rand)
+    elif kind == 10:
+        return ''
+    elif kind == 11:
+        fence = rand.choice(['```', '~~~'])
+        return (fence + rand.choice(['', 'python']) + '\n' + random_paragraph(rand) + '\n\n' +
+                rand.choice(['', '<div>', '[r2]: /path']) + '\n' + fence)
+    else:
+        return random_paragraph(rand)
+
+
+def random_edit(rand, text):
+    lines = text.split('\n')
+    index = rand.randint(0, len(lines) - 1)
+    kind = rand.randint(0, 3)
+    if kind == 0:
+        lines.insert(index, random_block(rand))
+    elif kind == 1:
+        del lines[index]
+    elif kind == 2:
+        lines.insert(index, '')
+    else:
+        lines[index] += ' ' + rand.choice(WORDS)
+
+    return '\n'.join(lines)
+
+
+class TestIncrementalConverter(unittest.TestCase):
+    def test_split_blocks(self):
+        markdown = dedent(u"""\
+        # Headings
+
+        Hello world
+        * item 1
+
+        * item 2
+
+            indented
+        [ref]: http://example.com/
+
+        > quote
+
+        Hello world
+        """)
+        blocks = split_blocks(markdown)
+        self.assertEqual([u'# Headings\n',
+                          u'Hello world\n* item 1\n\n* item 2\n\n    indented\n'
+                          u'[ref]: http://example.com/\n\n> quote\n',
+                          u'Hello world\n'],
+                         blocks)
+
+    def test_split_blocks_with_html(self):
+        markdown = dedent(u"""\
+        # Headings
+
+        <div>
+
+        Hello world
+
+        </div>
+        """)
+        self.assertEqual([markdown], split_blocks(markdown))
+
+    def test_split_blocks_with_fenced_code(self):
+        markdown = dedent(u"""\
+        # Headings
+
+        ```python
+        def hello():
+
+            pass
+
+        <div>
+        ```
+
+        Hello world
+        """)
+        blocks = split_blocks(markdown)
+        self.assertEqual([u'# Headings\n',
+                          u'```python\ndef hello():\n\n    pass\n\n<div>\n```\n',
+                          u'Hello world\n'],
+                         blocks)
+
+    def test_reuse_unchanged_blocks(self):
+        converter = IncrementalConverter()
+        converter.convert(u"# Headings\n\nHello world\n\n## Sub headings\n")
+
+        with mock.patch('sphinxcontrib.markdown.incremental.convert_block') as convert_block:
+            convert_block.return_value = []
+            converter.convert(u"# Headings\n\nHello Sphinx\n\n## Sub headings\n")
+            convert_block.assert_called_once_with(u'Hello Sphinx\n', {})
+
+    def test_converters_of_recent_documents(self):
+        def get_converter(docname):
+            config = mock.Mock(markdown_backend='markdown', markdown_incremental=True,
+                               markdown_fragment_cache_size=0)
+            env = mock.Mock(srcdir='/src', docname=docname, config=config)
+            return get_incremental_converter(env, None)
+
+        with mock.patch.dict(incremental_converters, clear=True):
+            with mock.patch('sphinxcontrib.markdown.MAX_INCREMENTAL_CONVERTERS', 2):
+                converter = get_converter('index')
+                get_converter('intro')
+                self.assertIs(converter, get_converter('index'))
+
+                # the least recently used one is dropped
+                get_converter('usage')
+                self.assertEqual(['index', 'usage'], [key[1] for key in incremental_converters])
+                self.assertIsNot(converter, get_converter('intro'))
+                self.assertEqual(['usage', 'intro'], [key[1] for key in incremental_converters])
+
+    def test_share_fragments(self):
+        fragments = FragmentCache(100)
+        document = u"[ref]: http://example.com/%d\n\n# Document\n\nLicensed under *BSD*.\n\nSee [Ref]\n"
+        with mock.patch('sphinxcontrib.markdown.incremental.convert_block', wraps=convert_block) as convert:
+            IncrementalConverter(fragments=fragments).convert(document % 1)
+            self.assertEqual(4, convert.call_count)
+
+            converted = IncrementalConverter(fragments=fragments, reuse_blocks=False).convert(document % 2)
+            self.assertEqual(md2node(document % 2).pformat(), converted.pformat())
+
+            # the block using the references is not shared
+            self.assertEqual(6, convert.call_count)
+            self.assertEqual(u'See [Ref]\n', convert.call_args[0][0])
+            self.assertEqual({'hits': 2, 'misses': 6, 'entries': 6, 'max_entries': 100}, fragments.stats())
+
+        # cached nodes are not changed by the converted document
+        converted[0][1] += nodes.Text(' modified')
+        converted = IncrementalConverter(fragments=fragments, reuse_blocks=False).convert(document % 2)
+        self.assertEqual(md2node(document % 2).pformat(), converted.pformat())
+
+    def test_same_as_full_conversion(self):
+        rand = random.Random(0)
+        for _ in range(100):
+            converter = IncrementalConverter()
+            text = '\n\n'.join(random_block(rand) for _ in range(rand.randint(1, 10)))
+            for _ in range(5):
+                try:
+                    expected = md2node(text)
+                except RuntimeError:  # unsupported elements (ex. <hr>)
+                    with self.assertRaises(RuntimeError):
+                        converter.convert(text)
+                else:
+                    actual = converter.convert(text)
+                    if expected == '':  # empty document
+                        self.assertEqual(expected, actual)
+                    else:
+                        self.assertEqual(expected.pformat(), actual.pformat(), text)
+
+                text = random_edit(rand, text)
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_incremental': True})
+    def test_build(self, app, status, warnings):
+        app.build()
+        self.assertEqual('', warnings.getvalue())
+
+        # rebuild a document after modification
+        with open(app.srcdir / 'index.md', 'a') as fd:
+            fd.write('\nAppended paragraph\n')
+
+        with mock.patch('sphinxcontrib.markdown.incremental.convert_block') as convert_block:
+            convert_block.return_value = []
+            app.build()
+            convert_block.assert_called_once_with(u'Appended paragraph\n', {})
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+from docutils import nodes
+from markdown.util import etree
+from sphinxcontrib.markdown import get_backend, inline, limit_time, TimeBudgetExceeded
+from sphinxcontrib.markdown.inline import find_code_spans, parse
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+#: adversarial inputs; the patterns of Python-Markdown take quadratic time or worse for them
+ADVERSARIAL = [
+    u'*a ' * 20000,
+    u'**a ' * 20000,
+    u'`a ' * 20000,
+    u'*_' * 20000,
+    u''.join(u'`' * i + u'a' for i in range(1, 300)),
+    u'*a ' * 10000 + u'b' + u' c*' * 100,
+]
+
+
+def depth(contents):
+    deepest = 0
+    stack = [(contents, 0)]
+    while stack:
+        contents, level = stack.pop()
+        deepest = max(deepest, level)
+        for content in contents:
+            if isinstance(content, tuple) and content[0] is not nodes.literal:
+                stack.append((content[1], level + 1))
+
+    return deepest
+
+
+class TestDelimiterParser(unittest.TestCase):
+    def test_emphasis(self):
+        self.assertEqual([u'Hello ', (nodes.emphasis, [u'world']), u' and ', (nodes.strong, [u'strong'])],
+                         parse(u"Hello *world* and **strong**"))
+        self.assertEqual([(nodes.strong, [u'a ', (nodes.emphasis, [u'b']), u' c'])], parse(u"**a *b* c**"))
+        self.assertEqual([(nodes.emphasis, [u'a']), u' ', (nodes.strong, [u'b'])], parse(u"_a_ __b__"))
+
+        # strong emphasis around emphasis, like Python-Markdown
+        self.assertEqual([(nodes.strong, [(nodes.emphasis, [u'a'])])], parse(u"***a***"))
+        self.assertEqual([(nodes.strong, [(nodes.emphasis, [u'a']), u' b'])], parse(u"***a* b**"))
+        self.assertEqual([(nodes.emphasis, [(nodes.strong, [u'a']), u' b'])], parse(u"***a** b*"))
+
+    def test_not_emphasis(self):
+        self.assertEqual([u'a * b * c'], parse(u"a * b * c"))
+        self.assertEqual([u'snake_case_word'], parse(u"snake_case_word"))
+        self.assertEqual([u'*a **b'], parse(u"*a **b"))
+        self.assertEqual([u'*a* **b**'], parse(u"\\*a\\* \\*\\*b\\*\\*"))
+
+        # the delimiters between a pair are kept as text
+        self.assertEqual([(nodes.emphasis, [u'a _b']), u' c_'], parse(u"*a _b* c_"))
+
+    def test_code_spans(self):
+        self.assertEqual([(nodes.literal, u'a'), u' and ', (nodes.literal, u'b ` c'), u' and ```d`'],
+                         parse(u"`a` and `` b ` c `` and ```d`"))
+        self.assertEqual([(nodes.literal, u'*a*'), u' ', (nodes.emphasis, [(nodes.literal, u'b')])],
+                         parse(u"`*a*` *`b`*"))
+        self.assertEqual([u'`a` b'], parse(u"\\`a` b"))
+
+    def test_find_code_spans(self):
+        self.assertEqual([(0, 3, u'a'), (4, 10, u'b')], find_code_spans(u"`a` ``b ``c ` d"))
+        self.assertEqual([], find_code_spans(u"`a ``b ```c"))
+
+    def test_deeply_nested(self):
+        contents = parse(u"_a *b " * 5000 + u"c" + u" d* e_" * 5000)
+        self.assertEqual(10000, depth(contents))
+
+        items = inline.make_items(u"_a *b " * 5000 + u"c" + u" d* e_" * 5000)
+        self.assertIsInstance(items[0], nodes.emphasis)
+
+    def test_linear_time(self):
+        for text in ADVERSARIAL:
+            started = time.time()
+            parse(text)
+            self.assertLess(time.time() - started, 5)
+
+
+class TestPathologicalText(unittest.TestCase):
+    def test_is_pathological(self):
+        self.assertFalse(inline.is_pathological(u"Hello *world*"))
+        self.assertTrue(inline.is_pathological(u"*a " * 1001))
+        self.assertTrue(inline.is_pathological(u"`" * 1001))
+        self.assertTrue(inline.is_pathological(u"*a* " * 5001))
+
+        # well-formed texts having many delimiters
+        self.assertFalse(inline.is_pathological(u"*a* " * 1001))
+        self.assertFalse(inline.is_pathological(u"[link](/%d) `code` *em* " * 340))
+        self.assertFalse(inline.is_pathological(u"*a* __b__ `c` " * 400 + u"*d " * 1000))
+
+    def test_well_formed_text(self):
+        text = u"".join(u"[link%d](/%d) `code` *em* " % (i, i) for i in range(340))
+        for backend in ('markdown', 'direct'):
+            with inline.record_fallbacks() as fallbacks:
+                doctree = get_backend(backend).md2node(text)
+            self.assertEqual([], fallbacks)
+            self.assertEqual(340, len(doctree.traverse(nodes.reference)))
+            self.assertEqual(340, len(doctree.traverse(nodes.literal)))
+
+    def test_same_as_patterns(self):
+        texts = [
+            u"Hello *emphasis*, **strong** and ***both*** with `code` and ``a ` b``",
+            u"Escaped \\*text\\* and snake_case_word with _emphasis_ and __strong__",
+            u"* item *a*\n* item **b**\n\n    nested `c`\n\n# Title *d*",
+            u"1. *a **b** c*\n2. `d`\n\nline\nbreak *e*",
+        ]
+        for backend in ('markdown', 'direct'):
+            md2node = get_backend(backend).md2node
+            for text in texts:
+                expected = md2node(text).pformat()
+                with mock.patch.object(inline, 'MAX_DELIMITERS', 0):
+                    self.assertEqual(expected, md2node(text).pformat())
+
+    def test_adversarial(self):
+        for text in ADVERSARIAL:
+            started = time.time()
+            with inline.record_fallbacks() as fallbacks:
+                doctree = get_backend('markdown').md2node(u'Paragraph ' + text)
+            self.assertLess(time.time() - started, 10)
+            self.assertEqual(1, len(fallbacks))
+
+            with inline.record_fallbacks() as fallbacks:
+                self.assertEqual(doctree.pformat(), get_backend('direct').md2node(u'Paragraph ' + text).pformat())
+            self.assertEqual(1, len(fallbacks))
+
+    def test_placeholders(self):
+        root = etree.Element('div')
+        item = etree.SubElement(root, 'li')
+        item.text = u'*a* ' * 5001
+        sublist = etree.SubElement(item, 'ul')
+        sublist.tail = u'c `b`' * 5001
+
+        inline.DeferPathologicalText().run(root)
+        self.assertIsNone(item.text)
+        self.assertEqual([inline.PLACEHOLDER_TAG, 'ul', inline.PLACEHOLDER_TAG], [e.tag for e in item])
+
+        inline.ParsePathologicalText().run(root)
+        self.assertEqual(['em'] * 5001 + ['ul'] + ['code'] * 5001, [e.tag for e in item])
+        self.assertEqual(u'c ', sublist.tail)
+        self.assertEqual(u'c ', item[-2].tail)
+
+
+class TestTimeBudget(unittest.TestCase):
+    def test_limit_time(self):
+        with self.assertRaises(TimeBudgetExceeded):
+            with mock.patch.multiple(inline, MAX_DELIMITERS=10 ** 9, MAX_UNPAIRED_DELIMITERS=10 ** 9):
+                with limit_time(0.01):
+                    get_backend('markdown').md2node(u'Paragraph ' + u'**a ' * 20000)
+
+        with self.assertRaises(TimeBudgetExceeded):
+            with limit_time(0.000001):
+                get_backend('direct').md2node(u'Paragraph ' + u'*a ' * 20000)
+
+        # no limit
+        with limit_time(None):
+            get_backend('markdown').md2node(u'Paragraph ' + u'*a ' * 20000)
+
+        # the limit of the outer block is kept
+        with self.assertRaises(TimeBudgetExceeded):
+            with limit_time(0.000001):
+                with limit_time(None):
+                    get_backend('direct').md2node(u'Paragraph ' + u'*a ' * 20000)
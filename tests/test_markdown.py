@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import io
+import os
 import sys
+import pickle
 from docutils import nodes
+from docutils.core import publish_doctree
 from textwrap import dedent
+from markdown.util import etree
 from sphinx_testing import with_app
-from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown import (
+    md2node, convert_with_timings, create_markdown, direct, iter_md2node, unescape_email, MarkdownEnginePool,
+    MarkdownParser, SectionPostprocessor, Serializer
+)
+from sphinxcontrib.markdown.incremental import convert_block
 
 if sys.version_info < (2, 7):
     import unittest2 as unittest
@@ -12,6 +21,14 @@ else:
     import unittest
 
 
+def load_doctree(app, docname):
+    with open(os.path.join(app.doctreedir, docname + '.doctree'), 'rb') as fd:
+        doctree = pickle.load(fd)
+
+    # ignore the path to source file
+    return ''.join(node.pformat() for node in doctree)
+
+
 class TestSphinxcontrib(unittest.TestCase):
     def test_simple(self):
         markdown = u"""
@@ -277,6 +294,16 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertEqual(1, len(items[1][0][0]))
         self.assertEqual('me@example.com', items[1][0][0].astext())
 
+    def test_email_having_entities(self):
+        doc = md2node(u"<caf\u00e9&bar@example.com>")
+        self.assertEqual(u'mailto:caf\u00e9&bar@example.com', doc[0][0].get('refuri'))
+        self.assertEqual(u'caf\u00e9&bar@example.com', doc[0][0].astext())
+
+    def test_unescape_email(self):
+        self.assertEqual(u'me@example.com', unescape_email(u'\x02amp\x03#109;e\x02amp\x03#64;example.com'))
+        self.assertEqual(u'caf\u00e9&', unescape_email(u'caf\x02amp\x03eacute;\x02amp\x03amp;'))
+        self.assertEqual(u'&unknown;', unescape_email(u'\x02amp\x03unknown;'))
+
     def test_html(self):
         markdown = u"""
         # Headings
@@ -332,6 +359,25 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertEqual('html', items[1][0]['format'])
         self.assertEqual('hello <em>Sphinx</em> world', items[1][0][0])
 
+    def test_html_in_tail(self):
+        markdown = u"""
+        *Hello* <span>world</span> \\*escaped\\* &amp; entity
+        """
+        doc = md2node(dedent(markdown))
+        self.assertEqual(2, len(doc[0]))
+        self.assertIsInstance(doc[0][0], nodes.emphasis)
+        self.assertIsInstance(doc[0][1], nodes.raw)
+        self.assertEqual(' <span>world</span> *escaped* &amp; entity', doc[0][1][0])
+
+    def test_many_escapes(self):
+        # the code of "{" (123) has three digits
+        doc = md2node(u"\\{braces\\} " + u"\\* \\_ \\{ " * 50)
+        self.assertEqual(u"{braces} " + u"* _ { " * 50, doc[0].astext())
+
+        doc = md2node(u"<b>a</b> \\{ " * 120)
+        self.assertIsInstance(doc[0][0], nodes.raw)
+        self.assertEqual(u"<b>a</b> { " * 120, doc[0][0].astext())
+
     def test_multiple_sections(self):
         markdown = u"""
         # Headings 1
@@ -408,6 +454,70 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertIsInstance(doc[0][1][1][1][1][2], nodes.section)
         self.assertEqual('# Headings 7', doc[0][1][1][1][1][2][0].astext())
 
+    def test_irregular_sections(self):
+        markdown = u"""
+        Preface
+
+        # Headings 1
+
+        ### Headings 1-1-1
+
+        ## Headings 1-2
+
+        Hello 1-2
+
+        ## Headings 1-3
+
+        # Headings 2
+        """
+        doc = md2node(dedent(markdown))
+        self.assertIsInstance(doc, nodes.container)
+        self.assertEqual(3, len(doc))
+        self.assertEqual('Preface', doc[0].astext())
+
+        section1 = doc[1]
+        self.assertEqual('Headings 1', section1[0].astext())
+        self.assertEqual(2, len(section1))
+
+        # a section is closed only by the section having same level
+        section111 = section1[1]
+        self.assertEqual('Headings 1-1-1', section111[0].astext())
+        self.assertEqual(3, len(section111))
+        self.assertEqual('Headings 1-2', section111[1][0].astext())
+        self.assertEqual('Hello 1-2', section111[1][1].astext())
+        self.assertEqual('Headings 1-3', section111[2][0].astext())
+        self.assertEqual(1, len(section111[2]))
+
+        section2 = doc[2]
+        self.assertEqual('Headings 2', section2[0].astext())
+        self.assertIs(doc, section2.parent)
+
+        # levels are used only for nesting
+        self.assertEqual([], [node for node in doc.traverse(nodes.section) if 'level' in node])
+
+    def test_section_ids(self):
+        markdown = u"""
+        # Headings 1
+
+        > # Quoted headings
+
+        ## Headings 1-1
+
+        * item
+
+            ### Headings in list
+
+        # Headings 2
+        """
+        doctree = publish_doctree(dedent(markdown), parser=MarkdownParser())
+        sections = [(node[0].astext(), node['ids']) for node in doctree.traverse(nodes.section)]
+        self.assertEqual([('Headings 1', ['section-1']),
+                          ('Quoted headings', ['section-2']),
+                          ('Headings 1-1', ['section-3']),
+                          ('Headings in list', ['section-4']),
+                          ('Headings 2', ['section-5'])],
+                         sections)
+
     def test_setext_header(self):
         markdown = u"""
         Headings
@@ -493,6 +603,28 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertIsInstance(subitems[1][1], nodes.bullet_list)
         self.assertEqual('Item 1-2-1', subitems[1][1][0].astext())
 
+    def test_list_item_having_raw_html_and_inline_nodes(self):
+        markdown = u"""
+        * <span>raw</span> `code` tail
+        * # Headings
+          in *list*
+        """
+        doc = md2node(dedent(markdown))
+        items = doc[0]
+        self.assertEqual(2, len(items[0]))
+        self.assertIsInstance(items[0][0], nodes.raw)
+        self.assertEqual('<span>raw</span> ', items[0][0].astext())
+        self.assertIsInstance(items[0][1], nodes.paragraph)
+        self.assertIsInstance(items[0][1][0], nodes.literal)
+        self.assertEqual('code tail', items[0][1].astext())
+
+        self.assertEqual(2, len(items[1]))
+        self.assertIsInstance(items[1][0], nodes.section)
+        self.assertEqual('Headings', items[1][0].astext())
+        self.assertIsInstance(items[1][1], nodes.paragraph)
+        self.assertIsInstance(items[1][1][1], nodes.emphasis)
+        self.assertEqual('list', items[1][1][1].astext())
+
     def test_ol(self):
         markdown = u"""
         # Headings
@@ -541,6 +673,31 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertIsInstance(doc[0][2], nodes.literal_block)
         self.assertEqual('Hello "this *beautiful* world"\n', doc[0][2].astext())
 
+    def test_fenced_code(self):
+        markdown = u"Hello\n\n```python\nif a < b:\n\n\tprint(\"\\*x* &amp;\")\n```\n\n~~~\n[ref]: /path\n~~~\n"
+        doc = md2node(markdown)
+        self.assertIsInstance(doc, nodes.container)
+        self.assertEqual(3, len(doc))
+
+        # fenced code is kept verbatim
+        self.assertIsInstance(doc[1], nodes.literal_block)
+        self.assertEqual(u'if a < b:\n\n\tprint("\\*x* &amp;")\n', doc[1].astext())
+        self.assertEqual('python', doc[1]['language'])
+        self.assertEqual(doc[1].astext(), doc[1].rawsource)  # highlighted by Sphinx
+
+        self.assertIsInstance(doc[2], nodes.literal_block)
+        self.assertEqual(u'[ref]: /path\n', doc[2].astext())
+        self.assertNotIn('language', doc[2])
+
+        # not closed
+        doc = md2node(u"```python\nprint(1)\n")
+        self.assertIsInstance(doc[0], nodes.paragraph)
+
+        # fenced code in raw HTML blocks is kept as is
+        doc = md2node(u"<div>\n```\n<p>code</p>\n\n```\n</div>\n")
+        self.assertIsInstance(doc[0][0], nodes.raw)
+        self.assertEqual(u"<div>\n```\n<p>code</p>\n\n```\n</div>", doc[0][0].astext())
+
     def test_quote(self):
         markdown = u"""
         # Headings
@@ -576,7 +733,220 @@ class TestSphinxcontrib(unittest.TestCase):
         self.assertIsInstance(quote[2][0][2], nodes.Text)
         self.assertEqual(' world"', quote[2][0][2])
 
+    def test_engine_is_reset_between_documents(self):
+        markdown = u"""
+        [Sphinx]: http://sphinx-doc.org/
+
+        [Sphinx]
+        """
+        doc = md2node(dedent(markdown))
+        self.assertIsInstance(doc[0][0], nodes.reference)
+
+        # references of previous document are not leaked
+        doc = md2node(u"[Sphinx]\n")
+        self.assertEqual(1, len(doc[0]))
+        self.assertIsInstance(doc[0][0], nodes.Text)
+        self.assertEqual('[Sphinx]', doc[0][0])
+
+    def test_unknown_element(self):
+        with self.assertRaises(RuntimeError):
+            md2node(u"Hello\n\n---\n")
+
+    def test_register_handler(self):
+        class CustomSerializer(Serializer):
+            pass
+
+        def visit_hr(serializer, element):
+            return nodes.transition()
+
+        CustomSerializer.register('hr', visit_hr)
+        doc = create_markdown(CustomSerializer).convert(u"Hello\n\n---\n")
+        self.assertEqual(2, len(doc))
+        self.assertIsInstance(doc[0], nodes.paragraph)
+        self.assertIsInstance(doc[1], nodes.transition)
+
+        # handlers of base class are not changed
+        self.assertIn('p', CustomSerializer.get_handlers())
+        self.assertNotIn('hr', Serializer.get_handlers())
+
+    def test_compact_nodes(self):
+        class CustomSerializer(Serializer):
+            def visit_br(self, element):
+                return nodes.Text('|')
+
+            def visit_hr(self, element):
+                return nodes.container()  # an empty container
+
+        markdown = u"Hello  \nworld  \n*Sphinx* !\n\n---\n\n* item  \nbody\n"
+        doc = create_markdown(CustomSerializer).convert(markdown)
+        self.assertEqual(2, len(doc))  # the empty container is dropped
+
+        # adjacent texts are merged into a Text node
+        self.assertEqual(3, len(doc[0]))
+        self.assertIsInstance(doc[0][0], nodes.Text)
+        self.assertEqual('Hello|\nworld|', doc[0][0])
+        self.assertIsInstance(doc[0][1], nodes.emphasis)
+        self.assertEqual('item|\nbody', doc[1][0][0][0])
+        self.assertEqual(1, len(doc[1][0][0]))
+
+    def test_deeply_nested_elements(self):
+        root = parent = etree.Element('div')
+        for i in range(5000):
+            item = etree.SubElement(etree.SubElement(parent, 'ul'), 'li')
+            item.text = 'item %d' % i
+            etree.SubElement(item, 'em').text = 'emphasis'
+            parent = etree.SubElement(item, 'blockquote')
+
+        node = create_markdown().serializer(root)
+        for i in range(5000):
+            self.assertEqual(1, len(node))
+            self.assertIsInstance(node[0], nodes.bullet_list)
+            item = node[0][0]
+            self.assertEqual(2, len(item))
+            self.assertEqual(['item %d' % i, 'emphasis'], [subnode.astext() for subnode in item[0]])
+            self.assertIsInstance(item[1], nodes.literal_block)
+            node = item[1]
+        self.assertEqual(0, len(node))
+
+    def test_deeply_nested_emphasis(self):
+        doc = md2node(u"Deep " + u"*a " * 6000 + u"b" + u" c*" * 6000)
+        node = doc[0]
+        self.assertIsInstance(node, nodes.paragraph)
+        for _ in range(6000):
+            self.assertEqual(2 if node is doc[0] else 3, len(node))
+            node = node[1]
+            self.assertIsInstance(node, nodes.emphasis)
+        self.assertEqual(['a b c'], node.children)
+
+    def test_deeply_nested_blocks(self):
+        # Python-Markdown recurses on each level of blocks; such documents are parsed by the direct backend
+        for convert in (md2node, direct.md2node):
+            node = convert(u"> " * 5000 + u"quoted *text*\n")
+            for _ in range(5000):
+                self.assertEqual(1, len(node))
+                self.assertIsInstance(node[0], nodes.literal_block)
+                self.assertIs(node, node[0].parent)
+                node = node[0]
+            self.assertEqual([u'quoted ', u'text'], [subnode.astext() for subnode in node[0]])
+
+            node = convert(u"* " * 5000 + u"item *text*\n")
+            for _ in range(5000):
+                self.assertEqual(1, len(node))
+                self.assertIsInstance(node[0], nodes.bullet_list)
+                self.assertIs(node, node[0].parent)
+                node = node[0][0]
+            self.assertEqual([u'item ', u'text'], [subnode.astext() for subnode in node[0]])
+
+        text = u"# Title\n\n" + u"1. > " * 2500 + u"item\n"
+        self.assertEqual(1, len(list(iter_md2node(text))))
+        self.assertEqual(1, len(convert_with_timings(text, {})))
+        self.assertEqual(2, len(convert_block(text, {})))
+
+        # the engines are reused after the failures
+        markdown = u"* item\n\n    > quote\n    > more\n\n* item\n"
+        self.assertEqual(direct.md2node(markdown).pformat(), md2node(markdown).pformat())
+
+    def test_handler_visiting_children(self):
+        class CustomSerializer(Serializer):
+            def visit_blockquote(self, element):
+                return nodes.block_quote('', *[self.visit(child) for child in element])
+
+        markdown = u"* Hello\n\n    > *world*\n    >\n    > * item\n"
+        doc = create_markdown(CustomSerializer).convert(markdown)
+        self.assertEqual(1, len(doc))
+        item = doc[0][0]
+        self.assertEqual(2, len(item))
+        self.assertEqual('Hello', item[0].astext())
+        self.assertIsInstance(item[1], nodes.block_quote)
+        self.assertIsInstance(item[1][0], nodes.paragraph)
+        self.assertIsInstance(item[1][0][0], nodes.emphasis)
+        self.assertIsInstance(item[1][1], nodes.bullet_list)
+
+    def test_many_sections(self):
+        container = nodes.container()
+        for i in range(6000):
+            section = nodes.section(level=i % 6 + 1)
+            section += nodes.title(text='Headings %d' % i)
+            container += section
+
+        doc = SectionPostprocessor().run(container)
+        self.assertEqual(1000, len(doc))
+        node = doc[-1]
+        for level in range(1, 6):
+            self.assertEqual(2, len(node))
+            node = node[1]
+        self.assertEqual('Headings 5999', node.astext())
+
+    def test_engine_pool(self):
+        pool = MarkdownEnginePool()
+        with pool.engine() as md1:
+            with pool.engine() as md2:
+                self.assertIsNot(md1, md2)
+
+        with pool.engine() as md3:
+            self.assertIn(md3, (md1, md2))
+
     @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True)
     def test_parser(self, app, status, warnings):
         app.build()
         self.assertEqual('', warnings.getvalue())
+
+        doctree = load_doctree(app, 'index')
+        self.assertIn('<title>\n        sphinxcontrib-markdown examples', doctree)
+        self.assertIn('<bullet_list>', doctree)
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_time_budget': 0.000001})
+    def test_time_budget(self, app, status, warnings):
+        app.build()
+        self.assertIn('index.md: WARNING: Markdown conversion exceeded markdown_time_budget', warnings.getvalue())
+        self.assertEqual('', load_doctree(app, 'index'))
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_time_budget': '0.000001'})
+    def test_time_budget_given_as_string(self, app, status, warnings):
+        # values overridden by -D option are given as strings
+        app.build()
+        self.assertIn('index.md: WARNING: Markdown conversion exceeded markdown_time_budget', warnings.getvalue())
+        self.assertEqual('', load_doctree(app, 'index'))
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True)
+    def test_pathological_text(self, app, status, warnings):
+        with io.open(os.path.join(app.srcdir, 'index.md'), 'a', encoding='utf-8') as fd:
+            fd.write(u"\n\nOpen " + u"*emphasis " * 2000 + u"\n")
+        app.build()
+        self.assertIn('index.md: WARNING: Markdown texts having too many delimiters (*, _ or `) are parsed '
+                      'in linear time (1 texts)', warnings.getvalue())
+        self.assertIn('*emphasis *emphasis', load_doctree(app, 'index'))
+
+    def test_parallel_build(self):
+        docnames = ('doc1', 'doc2', 'doc3')
+
+        def build(**kwargs):
+            @with_app(buildername='html', srcdir="tests/examples/parallel", copy_srcdir_to_tmpdir=True, **kwargs)
+            def _build(app, status, warnings):
+                app.build()
+                doctrees = {}
+                for docname in docnames:
+                    with open(os.path.join(app.doctreedir, docname + '.doctree'), 'rb') as fd:
+                        doctrees[docname] = pickle.load(fd)
+                return warnings.getvalue(), doctrees
+
+            return _build()
+
+        serial_warnings, serial_doctrees = build()
+        parallel_warnings, parallel_doctrees = build(parallel=2)
+
+        # no warnings for parallel build (extension declares parallel safety)
+        self.assertEqual('', serial_warnings)
+        self.assertEqual('', parallel_warnings)
+
+        for docname in docnames:
+            # the Markdown documents are read by the worker processes
+            self.assertEqual(os.getpid(), serial_doctrees[docname]['reader_pid'])
+            self.assertNotEqual(os.getpid(), parallel_doctrees[docname]['reader_pid'])
+
+            serial = ''.join(node.pformat() for node in serial_doctrees[docname])
+            parallel = ''.join(node.pformat() for node in parallel_doctrees[docname])
+            self.assertIn('Hello', parallel)
+            self.assertEqual(serial, parallel)
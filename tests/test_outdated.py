@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import MarkdownParser
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class TestOutdated(unittest.TestCase):
+    def setUp(self):
+        self.srcdir = tempfile.mkdtemp()
+        self.builddir = tempfile.mkdtemp()
+        self.write('conf.py', u"extensions = ['sphinxcontrib.markdown']\nmaster_doc = 'index'\n")
+        self.write('index.rst', u"Index\n=====\n\n.. toctree::\n\n   doc1\n   doc2\n   rst\n")
+        self.write('doc1.md', u"# Document 1\n\nHello *world*\n")
+        self.write('doc2.md', u"# Document 2\n\n* item\n")
+        self.write('rst.rst', u"reST\n====\n\nHello *world*\n")
+        self.touch('conf.py', 'index.rst', 'doc1.md', 'doc2.md', 'rst.rst', mtime=time.time() - 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.srcdir)
+        shutil.rmtree(self.builddir)
+
+    def write(self, filename, text):
+        with io.open(os.path.join(self.srcdir, filename), 'w', encoding='utf-8') as fd:
+            fd.write(text)
+
+    def touch(self, *filenames, **kwargs):
+        mtime = kwargs.get('mtime', time.time())
+        for filename in filenames:
+            os.utime(os.path.join(self.srcdir, filename), (mtime, mtime))
+
+    def build(self, **kwargs):
+        """Build the project, returning the docnames to read and the ones parsed by MarkdownParser."""
+        outdated = []
+        parsed = []
+        parse = MarkdownParser.parse
+
+        def wrapped_parse(self, inputstring, document):
+            parsed.append(document.settings.env.docname)
+            return parse(self, inputstring, document)
+
+        @with_app(buildername='html', srcdir=self.srcdir, outdir=os.path.join(self.builddir, 'html'),
+                  doctreedir=os.path.join(self.builddir, 'doctrees'), **kwargs)
+        def _build(app, status, warnings):
+            app.connect('env-before-read-docs', lambda app, env, docnames: outdated.extend(docnames))
+            with mock.patch.object(MarkdownParser, 'parse', wrapped_parse):
+                app.build()
+            self.assertEqual('', warnings.getvalue())
+
+        _build()
+        return sorted(outdated), sorted(parsed)
+
+    def test_touched_files_are_not_read(self):
+        self.assertEqual((['doc1', 'doc2', 'index', 'rst'], ['doc1', 'doc2']), self.build())
+
+        # touched without changes
+        self.touch('doc1.md', 'doc2.md', 'rst.rst')
+        self.assertEqual((['rst'], []), self.build())
+
+        # once skipped, they are not checked again until modified
+        with mock.patch('sphinxcontrib.markdown.outdated.get_digest', return_value='x') as get_digest:
+            self.assertEqual(([], []), self.build())
+            self.assertFalse(get_digest.called)
+
+        # modified
+        self.write('doc2.md', u"# Document 2\n\n* item\n* item\n")
+        self.touch('doc2.md')
+        self.assertEqual((['doc2'], ['doc2']), self.build())
+
+    def test_config_changed(self):
+        self.build()
+        self.assertEqual((['doc1', 'doc2', 'index', 'rst'], ['doc1', 'doc2']),
+                         self.build(confoverrides={'project': 'changed'}))
+
+    def test_markdown_config_changed(self):
+        self.build()
+
+        # options not changing the doctrees
+        for confoverrides in ({'markdown_cache_size': 1000}, {'markdown_preparse_jobs': 2},
+                              {'markdown_profile_report': os.path.join(self.builddir, 'profile.txt')},
+                              {'markdown_fragment_cache_size': 100}, {'markdown_incremental': True}):
+            self.assertEqual(([], []), self.build(confoverrides=confoverrides))
+
+        self.assertEqual((['doc1', 'doc2', 'index', 'rst'], ['doc1', 'doc2']),
+                         self.build(confoverrides={'markdown_backend': 'direct'}))
+        self.assertEqual((['doc1', 'doc2', 'index', 'rst'], ['doc1', 'doc2']),
+                         self.build(confoverrides={'markdown_backend': 'direct', 'markdown_time_budget': 10}))
+
+    def test_parallel_build(self):
+        self.build(parallel=2)
+
+        # the digests are merged from the readers
+        self.touch('doc1.md', 'doc2.md')
+        self.assertEqual(([], []), self.build(parallel=2))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import md2node
+from sphinxcontrib.markdown.preparse import Preparser
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def make_text(i):
+    return u"# Headings %d\n\nHello *world* %d\n\n* item\n* item\n" % (i, i)
+
+
+def load_doctree(app, docname):
+    with open(os.path.join(app.doctreedir, docname + '.doctree'), 'rb') as fd:
+        return ''.join(node.pformat() for node in pickle.load(fd))
+
+
+class TestPreparser(unittest.TestCase):
+    def test_get(self):
+        preparser = Preparser(processes=2, chunksize=2)
+        try:
+            preparser.start([('doc%d' % i, make_text(i)) for i in range(5)] + [('hr', u"---\n")])
+            self.assertEqual(6, len(preparser))
+            self.assertEqual(md2node(make_text(3)).pformat(), preparser.get('doc3', make_text(3)).pformat())
+
+            # the results are used only once
+            self.assertIsNone(preparser.get('doc3', make_text(3)))
+
+            # the text is changed after the conversion (ex. by source-read event)
+            self.assertIsNone(preparser.get('doc1', make_text(100)))
+
+            # the document failed to convert
+            self.assertIsNone(preparser.get('hr', u"---\n"))
+
+            # not converted
+            self.assertIsNone(preparser.get('unknown', make_text(0)))
+        finally:
+            preparser.terminate()
+        self.assertEqual(0, len(preparser))
+
+    def test_time_budget(self):
+        preparser = Preparser(processes=1, time_budget=0.000001)
+        try:
+            preparser.start([('doc', make_text(0))])
+            self.assertIsNone(preparser.get('doc', make_text(0)))
+        finally:
+            preparser.terminate()
+
+    def test_pathological_text(self):
+        # converted again by the reader to warn about it
+        preparser = Preparser(processes=1)
+        try:
+            preparser.start([('doc', make_text(0)), ('open', u"Open " + u"*emphasis " * 2000)])
+            self.assertIsNotNone(preparser.get('doc', make_text(0)))
+            self.assertIsNone(preparser.get('open', u"Open " + u"*emphasis " * 2000))
+        finally:
+            preparser.terminate()
+
+    def test_wait(self):
+        preparser = Preparser(backend='direct', processes=2)
+        preparser.start([('doc%d' % i, make_text(i)) for i in range(5)])
+        preparser.wait()
+        self.assertIsNone(preparser.pool)
+        self.assertEqual(md2node(make_text(4)).pformat(), preparser.get('doc4', make_text(4)).pformat())
+
+
+class TestPreparse(unittest.TestCase):
+    def setUp(self):
+        self.srcdir = tempfile.mkdtemp()
+        docnames = []
+        for i in range(5):
+            with io.open(os.path.join(self.srcdir, 'doc%d.md' % i), 'w', encoding='utf-8') as fd:
+                fd.write(make_text(i))
+            with io.open(os.path.join(self.srcdir, 'rst%d.rst' % i), 'w', encoding='utf-8') as fd:
+                fd.write(u"reST %d\n======\n\nHello *world*\n" % i)
+            docnames.extend(['doc%d' % i, 'rst%d' % i])
+
+        with io.open(os.path.join(self.srcdir, 'index.rst'), 'w', encoding='utf-8') as fd:
+            fd.write(u"Index\n=====\n\n.. toctree::\n\n" + u''.join(u'   %s\n' % name for name in docnames))
+        with io.open(os.path.join(self.srcdir, 'conf.py'), 'w', encoding='utf-8') as fd:
+            fd.write(u"extensions = ['sphinxcontrib.markdown']\nmaster_doc = 'index'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.srcdir)
+
+    def build(self, **kwargs):
+        docnames = ['doc%d' % i for i in range(5)]
+        read = []
+
+        @with_app(buildername='html', srcdir=self.srcdir, copy_srcdir_to_tmpdir=True, **kwargs)
+        def _build(app, status, warnings):
+            app.connect('source-read', lambda app, docname, source: read.append(docname))
+            app.build()
+            return warnings.getvalue(), [load_doctree(app, docname) for docname in docnames]
+
+        warnings, doctrees = _build()
+        return warnings, doctrees, read
+
+    def test_build(self):
+        _, expected, _ = self.build()
+
+        preparsed = []
+        get = Preparser.get
+
+        def wrapped_get(self, docname, text):
+            doctree = get(self, docname, text)
+            preparsed.append((docname, doctree is not None))
+            return doctree
+
+        with mock.patch.object(Preparser, 'get', wrapped_get):
+            warnings, doctrees, read = self.build(confoverrides={'markdown_preparse_jobs': 2})
+        self.assertEqual('', warnings)
+        self.assertEqual(expected, doctrees)
+
+        # all Markdown documents are converted ahead, and read after reST documents
+        self.assertEqual([('doc%d' % i, True) for i in range(5)], preparsed)
+        self.assertEqual(['index'] + ['rst%d' % i for i in range(5)] + ['doc%d' % i for i in range(5)], read)
+
+    def test_parallel_build(self):
+        _, expected, _ = self.build()
+        warnings, doctrees, _ = self.build(confoverrides={'markdown_preparse_jobs': 2}, parallel=2)
+        self.assertEqual('', warnings)
+        self.assertEqual(expected, doctrees)
+
+    def test_time_budget_given_as_string(self):
+        # values overridden by -D option are given as strings
+        _, expected, _ = self.build()
+        warnings, doctrees, _ = self.build(confoverrides={'markdown_preparse_jobs': 2, 'markdown_time_budget': '10'})
+        self.assertEqual('', warnings)
+        self.assertEqual(expected, doctrees)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+from textwrap import dedent
+from sphinx_testing import with_app
+from sphinxcontrib.markdown import md2node, convert_with_timings
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+
+class TestProfiling(unittest.TestCase):
+    def test_convert_with_timings(self):
+        markdown = dedent(u"""
+        # Headings
+
+        Hello world
+
+        ## Sub headings
+        """)
+        timings = {}
+        sections = []
+        doc = convert_with_timings(markdown, timings, sections)
+        self.assertEqual([node.pformat() for node in md2node(markdown)],
+                         [node.pformat() for node in doc])
+        self.assertEqual(['markdown', 'sections', 'serialize'], sorted(timings))
+        self.assertEqual(2, len(sections))
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_profile': True})
+    def test_build(self, app, status, warnings):
+        app.build()
+        self.assertEqual('', warnings.getvalue())
+        self.assertIn('markdown profile: 1 documents', status.getvalue())
+
+        with open(os.path.join(app.outdir, 'markdown-profile.json')) as fd:
+            report = json.load(fd)
+        self.assertEqual(['index'], list(report['documents']))
+        profile = report['documents']['index']
+        self.assertEqual(['markdown', 'sections', 'serialize', 'targets'], sorted(profile['timings']))
+        self.assertGreater(profile['nodes'], 0)
+        self.assertEqual(1, report['total']['documents'])
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True,
+              confoverrides={'markdown_profile': True, 'markdown_incremental': True}, parallel=4)
+    def test_parallel_build(self, app, status, warnings):
+        app.build()
+        self.assertEqual('', warnings.getvalue())
+
+        with open(os.path.join(app.outdir, 'markdown-profile.json')) as fd:
+            report = json.load(fd)
+        self.assertEqual(['convert', 'targets'], sorted(report['documents']['index']['timings']))
+
+    @with_app(buildername='html', srcdir="tests/examples/basic", copy_srcdir_to_tmpdir=True)
+    def test_disabled(self, app, status, warnings):
+        app.build()
+        self.assertNotIn('markdown profile', status.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(app.outdir, 'markdown-profile.json')))
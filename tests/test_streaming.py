@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from docutils import nodes
+from docutils.core import publish_doctree
+from textwrap import dedent
+from sphinxcontrib.markdown import md2node, iter_md2node, nest_sections, MarkdownParser
+
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+
+DOCUMENT = dedent(u"""
+    Preface with <span>HTML</span>
+
+    # Headings 1
+
+    Hello *world*
+
+    * item 1
+    * item 2
+
+    ### Headings 1-1-1
+
+    ## Headings 1-2
+
+        code block
+
+    # Headings 2
+
+    > quote
+
+    # Headings 3
+""")
+
+
+def section(level, title):
+    node = nodes.section(level=level)
+    node += nodes.title(text=title)
+    return node
+
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_md2node(self):
+        expected = md2node(DOCUMENT)
+        actual = list(iter_md2node(DOCUMENT))
+        self.assertEqual(4, len(actual))
+        self.assertEqual([node.pformat() for node in expected],
+                         [node.pformat() for node in actual])
+
+    def test_iter_md2node_for_empty_document(self):
+        self.assertEqual([], list(iter_md2node(u'\n\n')))
+
+    def test_nest_sections_yields_finished_nodes(self):
+        consumed = []
+
+        def flat_nodes():
+            for node in [nodes.paragraph(text='preface'), section(1, 'h1'), section(2, 'h1-1'),
+                         nodes.paragraph(text='hello'), section(1, 'h2'), nodes.paragraph(text='world')]:
+                consumed.append(node)
+                yield node
+
+        iterator = nest_sections(flat_nodes())
+        self.assertEqual('preface', next(iterator).astext())
+        self.assertEqual(1, len(consumed))
+
+        # first section is yielded when the next section of the same level comes
+        section1 = next(iterator)
+        self.assertEqual(5, len(consumed))
+        self.assertEqual('h1', section1[0].astext())
+        self.assertEqual('h1-1', section1[1][0].astext())
+        self.assertEqual('hello', section1[1][1].astext())
+
+        # last section is yielded at the end
+        section2 = next(iterator)
+        self.assertEqual(6, len(consumed))
+        self.assertEqual('h2', section2[0].astext())
+        self.assertEqual('world', section2[1].astext())
+        self.assertEqual([], list(iterator))
+
+    def test_parse_without_sphinx(self):
+        doctree = publish_doctree(DOCUMENT, parser=MarkdownParser())
+        self.assertEqual(4, len(doctree))
+        self.assertIsInstance(doctree[0][0], nodes.raw)
+        self.assertIsInstance(doctree[1], nodes.section)
+        self.assertTrue(doctree[1]['ids'])